@@ -0,0 +1,271 @@
+"""
+Batch and server query modes for degrees.
+
+Batch mode reads one "source<TAB>target" pair of names per line from a
+file or stdin and writes one JSON result per line to stdout. Server mode
+answers GET /path?source=...&target=... requests over HTTP.
+
+Queries are fanned out over a process pool. Every worker memory-maps the
+same graph snapshot, so the loaded graph is shared read-only between
+processes through the page cache.
+"""
+
+import argparse
+import json
+import queue
+import sys
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from snapshot import load_snapshot
+
+# Queries of a batch answered together by one worker, and most chunks
+# submitted but not yet written out
+CHUNK = 16
+WINDOW = 64
+
+# Graph of the current worker process
+graph = None
+
+
+def init_worker(directory, snapshot=None):
+    """
+    Loads the graph snapshot in a worker process.
+    """
+    global graph
+    graph = load_snapshot(directory, snapshot)
+
+
+def person_id_for_name(name):
+    """
+    Returns the IMDb id for a person's name or id.
+
+    Raises ValueError if no one, or more than one person, has that name.
+    """
+    person_ids = graph.person_ids_for_name(name)
+    if not person_ids:
+        try:
+            graph.person_index(name)
+        except KeyError:
+            raise ValueError(f"person not found: {name}")
+        return name
+    if len(person_ids) > 1:
+        raise ValueError(
+            f"ambiguous name: {name} (ids {', '.join(sorted(person_ids))})")
+    return person_ids[0]
+
+
+def answer(query):
+    """
+    Returns the JSON-serializable result of a (source, target) query.
+    """
+    source_name, target_name = query
+    result = {"source": source_name, "target": target_name}
+    try:
+        source = person_id_for_name(source_name)
+        target = person_id_for_name(target_name)
+    except ValueError as e:
+        result["error"] = str(e)
+        return result
+
+    path = graph.shortest_path(source, target, bidirectional=True)
+    if path is None:
+        result["degrees"] = None
+        result["path"] = None
+        return result
+    result["degrees"] = len(path)
+    result["path"] = [
+        {
+            "movie_id": movie_id,
+            "title": graph.movie(movie_id)["title"],
+            "person_id": person_id,
+            "name": graph.person(person_id)["name"]
+        }
+        for movie_id, person_id in path
+    ]
+    return result
+
+
+def answer_all(queries):
+    """
+    Returns the results of a list of queries.
+    """
+    return [answer(query) for query in queries]
+
+
+def read_queries(lines):
+    """
+    Yields (source, target) pairs from tab-separated lines,
+    skipping blank ones.
+    """
+    for line in lines:
+        line = line.rstrip("\n")
+        if not line.strip():
+            continue
+        source, _, target = line.partition("\t")
+        yield source.strip(), target.strip()
+
+
+def read_chunks(lines, chunk=CHUNK):
+    """
+    Yields lists of the queries of `lines` as they arrive: each list
+    starts with the next query and takes up to `chunk` of those already
+    read after it, so a query is never held back waiting for more input.
+
+    Lines are read on a separate thread, at most `chunk` ahead.
+    """
+    incoming = queue.Queue(maxsize=chunk)
+    done = object()
+
+    def read():
+        try:
+            for query in read_queries(lines):
+                incoming.put(query)
+        except Exception as e:
+            incoming.put(e)
+        incoming.put(done)
+
+    # A daemon, so that a reader blocked on input does not keep the
+    # process alive once the batch has stopped
+    threading.Thread(target=read, daemon=True).start()
+    while True:
+        item = incoming.get()
+        batch = []
+        while item is not done:
+            if isinstance(item, Exception):
+                raise item
+            batch.append(item)
+            if len(batch) == chunk:
+                break
+            try:
+                item = incoming.get_nowait()
+            except queue.Empty:
+                break
+        if batch:
+            yield batch
+        if item is done:
+            return
+
+
+def run_batch(executor, lines, output, chunk=CHUNK, window=WINDOW):
+    """
+    Answers every query in `lines`, writing results as JSON lines
+    in input order.
+
+    Queries are submitted as soon as they are read, up to `chunk` at a
+    time when more are waiting, with at most `window` chunks waiting to
+    be written out, and a writer thread writes and flushes the results
+    of each chunk as soon as it and those before it are done.
+    """
+    pending = queue.Queue(maxsize=window)
+    errors = []
+
+    def write_results():
+        while True:
+            future = pending.get()
+            if future is None:
+                return
+
+            # After a failed write, keep taking futures so that the
+            # reader is not blocked, and report the error at the end
+            if errors:
+                future.cancel()
+                continue
+            try:
+                for result in future.result():
+                    output.write(json.dumps(result) + "\n")
+                output.flush()
+            except Exception as e:
+                errors.append(e)
+
+    # Start the workers before the reader thread: a worker forked while
+    # that thread is blocked reading stdin would wait forever on its
+    # lock when closing stdin on startup
+    executor.submit(answer_all, []).result()
+
+    writer = threading.Thread(target=write_results)
+    writer.start()
+    try:
+        for batch in read_chunks(lines, chunk):
+            if errors:
+                break
+            pending.put(executor.submit(answer_all, batch))
+    finally:
+        pending.put(None)
+        writer.join()
+    if errors:
+        raise errors[0]
+
+
+def run_server(executor, host, port):
+    """
+    Serves queries over HTTP until interrupted.
+    """
+
+    class Handler(BaseHTTPRequestHandler):
+
+        def do_GET(self):
+            url = urlparse(self.path)
+            params = parse_qs(url.query)
+            if (url.path != "/path"
+                    or "source" not in params or "target" not in params):
+                self.send_error(
+                    400, "expected /path?source=NAME&target=NAME")
+                return
+            query = (params["source"][0], params["target"][0])
+            body = json.dumps(executor.submit(answer, query).result())
+            body = body.encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    print(f"Serving on http://{host}:{server.server_port}", file=sys.stderr)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("directory", nargs="?", default="large")
+    parser.add_argument("-i", "--input",
+                        help="file of tab-separated name pairs "
+                             "(default: stdin)")
+    parser.add_argument("-w", "--workers", type=int,
+                        help="number of worker processes")
+    parser.add_argument("--serve", type=int, metavar="PORT",
+                        help="serve queries over HTTP instead")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--snapshot", metavar="PATH",
+                        help="graph snapshot file "
+                             "(default: graph.snapshot in the directory)")
+    args = parser.parse_args()
+
+    # Build the snapshot once, before the workers map it
+    print("Loading data...", file=sys.stderr)
+    load_snapshot(args.directory, args.snapshot)
+    print("Data loaded.", file=sys.stderr)
+
+    executor = ProcessPoolExecutor(
+        max_workers=args.workers, initializer=init_worker,
+        initargs=(args.directory, args.snapshot))
+    with executor:
+        if args.serve is not None:
+            run_server(executor, args.host, args.serve)
+        elif args.input:
+            with open(args.input, encoding="utf-8") as f:
+                run_batch(executor, f, sys.stdout)
+        else:
+            run_batch(executor, sys.stdin, sys.stdout)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,175 @@
+"""
+Benchmarks for the degrees search.
+
+Usage: python benchmark.py [directory] [queries]
+"""
+
+import random
+import sys
+import time
+
+import degrees
+from graph import load_graph
+from neighborhood import levels
+from snapshot import load_snapshot
+
+
+def random_pairs(count, seed=0):
+    """
+    Returns `count` reproducible (source, target) pairs of person ids.
+    """
+    generator = random.Random(seed)
+    person_ids = sorted(degrees.people)
+    return [(generator.choice(person_ids), generator.choice(person_ids))
+            for _ in range(count)]
+
+
+def run_search(search, pairs):
+    """
+    Runs `search` on every pair and returns the lengths of the paths found,
+    the number of people expanded and the total wall time.
+    """
+    expanded = 0
+    neighbors_for_person = degrees.neighbors_for_person
+
+    def counting_neighbors(person_id):
+        nonlocal expanded
+        expanded += 1
+        return neighbors_for_person(person_id)
+
+    degrees.neighbors_for_person = counting_neighbors
+    try:
+        start = time.perf_counter()
+        lengths = []
+        for source, target in pairs:
+            path = search(source, target)
+            lengths.append(None if path is None else len(path))
+        elapsed = time.perf_counter() - start
+    finally:
+        degrees.neighbors_for_person = neighbors_for_person
+    return lengths, expanded, elapsed
+
+
+def run_compact_search(graph, pairs, bidirectional):
+    """
+    Runs the CompactGraph search on every pair and returns the lengths of
+    the paths found, the number of people expanded and the total wall time.
+    """
+    graph.expanded = 0
+    start = time.perf_counter()
+    lengths = []
+    for source, target in pairs:
+        path = graph.shortest_path(source, target, bidirectional)
+        lengths.append(None if path is None else len(path))
+    return lengths, graph.expanded, time.perf_counter() - start
+
+
+def compare_searches(graph, pairs):
+    """
+    Compares one-sided and bidirectional breadth-first search
+    on the dict and compact representations.
+
+    The "expanded" column of the indexed search counts index misses only.
+    """
+    index = degrees.CostarIndex()
+    searches = [
+        ("bfs", lambda: run_search(degrees.shortest_path, pairs)),
+        ("bidirectional", lambda: run_search(
+            lambda source, target: degrees.shortest_path(
+                source, target, bidirectional=True), pairs)),
+        ("indexed bidir", lambda: run_search(
+            lambda source, target: degrees.shortest_path(
+                source, target, bidirectional=True, index=index), pairs)),
+        ("compact bfs", lambda: run_compact_search(graph, pairs, False)),
+        ("compact bidir", lambda: run_compact_search(graph, pairs, True)),
+    ]
+    print(f"{'search':<16}{'expanded':>12}{'seconds':>12}")
+    results = []
+    for name, search in searches:
+        lengths, expanded, elapsed = search()
+        results.append(lengths)
+        print(f"{name:<16}{expanded:>12}{elapsed:>12.3f}")
+    print(f"Index hits: {index.hits}, misses: {index.misses}.")
+    if any(lengths != results[0] for lengths in results):
+        sys.exit("Searches disagree on path lengths.")
+
+
+def deep_sizeof(value, seen=None):
+    """
+    Returns the approximate memory footprint of a nest of dicts, sets,
+    lists, tuples and scalars, counting shared objects once.
+    """
+    if seen is None:
+        seen = set()
+    if id(value) in seen:
+        return 0
+    seen.add(id(value))
+    size = sys.getsizeof(value)
+    if isinstance(value, dict):
+        size += sum(deep_sizeof(key, seen) + deep_sizeof(item, seen)
+                    for key, item in value.items())
+    elif isinstance(value, (set, frozenset, list, tuple)):
+        size += sum(deep_sizeof(item, seen) for item in value)
+    return size
+
+
+def compare_memory(graph):
+    """
+    Reports the memory footprint of the dict and compact representations.
+    """
+    seen = set()
+    dict_size = sum(deep_sizeof(value, seen) for value in
+                    (degrees.names, degrees.people, degrees.movies))
+    print(f"{'representation':<16}{'megabytes':>12}")
+    print(f"{'dicts':<16}{dict_size / 2 ** 20:>12.1f}")
+    print(f"{'compact':<16}{graph.nbytes() / 2 ** 20:>12.1f}")
+
+
+def compare_neighborhoods(graph, hubs=5, max_depth=6):
+    """
+    Times full distance distributions from the people
+    with the most movies.
+    """
+    people = sorted(
+        range(len(graph.person_ids)),
+        key=lambda person: len(graph.movies_of(person)), reverse=True)
+    print(f"{'hub':<24}{'reached':>12}{'seconds':>12}  counts")
+    for person in people[:hubs]:
+        start = time.perf_counter()
+        counts = [len(level) for level in levels(graph, [person], max_depth)]
+        elapsed = time.perf_counter() - start
+        print(f"{graph.names[person][:23]:<24}{sum(counts):>12}"
+              f"{elapsed:>12.3f}  {counts}")
+
+    start = time.perf_counter()
+    counts = [len(level) for level in levels(graph, people[:hubs], max_depth)]
+    elapsed = time.perf_counter() - start
+    print(f"{'all hubs':<24}{sum(counts):>12}{elapsed:>12.3f}  {counts}")
+
+
+def main():
+    if len(sys.argv) > 3:
+        sys.exit("Usage: python benchmark.py [directory] [queries]")
+    directory = sys.argv[1] if len(sys.argv) > 1 else "large"
+    queries = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+
+    print("Loading data...")
+    start = time.perf_counter()
+    degrees.load_data(directory)
+    print(f"Data loaded in {time.perf_counter() - start:.3f}s.")
+    start = time.perf_counter()
+    graph = load_graph(directory)
+    print(f"Compact graph loaded in {time.perf_counter() - start:.3f}s.")
+    load_snapshot(directory)
+    start = time.perf_counter()
+    load_snapshot(directory)
+    print(f"Snapshot loaded in {time.perf_counter() - start:.3f}s.")
+
+    compare_memory(graph)
+    pairs = random_pairs(queries)
+    compare_searches(graph, pairs)
+    compare_neighborhoods(graph)
+
+
+if __name__ == "__main__":
+    main()
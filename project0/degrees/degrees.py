@@ -1,7 +1,6 @@
 import csv
 import sys
-
-from util import Node, StackFrontier, QueueFrontier
+from collections import OrderedDict, deque
 
 # Maps names to a set of corresponding person_ids
 names = {}
@@ -57,19 +56,22 @@ def main():
         sys.exit("Usage: python degrees.py [directory]")
     directory = sys.argv[1] if len(sys.argv) == 2 else "large"
 
-    # Load data from files into memory
+    # Load the graph from its snapshot, building that from the CSV files
+    # only when they have changed; imported here so that this file keeps
+    # working on its own with load_data
+    from snapshot import load_snapshot
     print("Loading data...")
-    load_data(directory)
+    graph = load_snapshot(directory)
     print("Data loaded.")
 
-    source = person_id_for_name(input("Name: "))
+    source = person_id_for_name(input("Name: "), graph)
     if source is None:
         sys.exit("Person not found.")
-    target = person_id_for_name(input("Name: "))
+    target = person_id_for_name(input("Name: "), graph)
     if target is None:
         sys.exit("Person not found.")
 
-    path = shortest_path(source, target)
+    path = graph.shortest_path(source, target)
 
     if path is None:
         print("Not connected.")
@@ -78,61 +80,146 @@ def main():
         print(f"{degrees} degrees of separation.")
         path = [(None, source)] + path
         for i in range(degrees):
-            person1 = people[path[i][1]]["name"]
-            person2 = people[path[i + 1][1]]["name"]
-            movie = movies[path[i + 1][0]]["title"]
+            person1 = graph.person(path[i][1])["name"]
+            person2 = graph.person(path[i + 1][1])["name"]
+            movie = graph.movie(path[i + 1][0])["title"]
             print(f"{i + 1}: {person1} and {person2} starred in {movie}")
 
 
-def shortest_path(source, target):
+def shortest_path(source, target, bidirectional=False, index=None):
     """
     Returns the shortest list of (movie_id, person_id) pairs
     that connect the source to the target.
 
+    If `bidirectional` is set, the search expands from both ends
+    and meets in the middle. If a CostarIndex is given as `index`,
+    neighbors are looked up in it instead of being rebuilt.
+
     If no possible path, returns None.
     """
-    queue = QueueFrontier()
-    checked = set()
-    initial_node = Node(state=source, parent=None, action=None)
-    queue.add(initial_node)
-    while not queue.empty():
-        current_node = queue.remove()
-        if current_node.state == target:
-            return path(current_node, [])
-        checked.add(current_node.state)
-        neighbors = neighbors_for_person(current_node.state)
-        for neighbor in neighbors:
-            action, next_state = neighbor
-            if queue.contains_state(next_state) or next_state in checked:
+    neighbors_of = neighbors_for_person if index is None else index.neighbors
+    if bidirectional:
+        return bidirectional_shortest_path(source, target, neighbors_of)
+    if source == target:
+        return []
+
+    # Maps each reached person to the (movie_id, person_id) step that
+    # reached them, standing in for both the explored set and Node objects
+    parents = {source: None}
+    queue = deque([source])
+    while queue:
+        person_id = queue.popleft()
+        for movie_id, neighbor_id in neighbors_of(person_id):
+            if neighbor_id in parents:
                 continue
-            new_node = Node(next_state, current_node, action)
-            queue.add(new_node)
+            parents[neighbor_id] = (movie_id, person_id)
+            if neighbor_id == target:
+                return path(parents, target)
+            queue.append(neighbor_id)
 
     return None
 
 
-def path(node, current):
+def bidirectional_shortest_path(source, target, neighbors_of=None):
     """
-    Returns the list from the root to the given node.
+    Returns the shortest list of (movie_id, person_id) pairs
+    that connect the source to the target, searching breadth-first
+    from both people at once and always growing the smaller frontier
+    by one full level.
+
+    If no possible path, returns None.
     """
-    if node.parent is None:
-        return current
-    current.insert(0, (node.action, node.state))
-    return path(node.parent, current)
+    if neighbors_of is None:
+        neighbors_of = neighbors_for_person
+    if source == target:
+        return []
+
+    # Maps each reached person to the (movie_id, person_id) step
+    # leading back towards the root of that side of the search
+    forward_parents = {source: None}
+    backward_parents = {target: None}
+    forward_frontier = [source]
+    backward_frontier = [target]
+
+    while forward_frontier and backward_frontier:
+        forward = len(forward_frontier) <= len(backward_frontier)
+        if forward:
+            frontier = forward_frontier
+            parents, other_parents = forward_parents, backward_parents
+        else:
+            frontier = backward_frontier
+            parents, other_parents = backward_parents, forward_parents
+
+        # Both sides were disjoint before this level, so the first
+        # person reached by both searches lies on a shortest path
+        next_frontier = []
+        for person_id in frontier:
+            for movie_id, neighbor_id in neighbors_of(person_id):
+                if neighbor_id in parents:
+                    continue
+                parents[neighbor_id] = (movie_id, person_id)
+                if neighbor_id in other_parents:
+                    return join_paths(
+                        neighbor_id, forward_parents, backward_parents)
+                next_frontier.append(neighbor_id)
 
+        if forward:
+            forward_frontier = next_frontier
+        else:
+            backward_frontier = next_frontier
 
-def person_id_for_name(name):
+    return None
+
+
+def join_paths(meeting, forward_parents, backward_parents):
+    """
+    Returns the list of (movie_id, person_id) pairs from the source
+    to the target through the person where both searches met.
+    """
+    steps = path(forward_parents, meeting)
+    person_id = meeting
+    while backward_parents[person_id] is not None:
+        movie_id, child_id = backward_parents[person_id]
+        steps.append((movie_id, child_id))
+        person_id = child_id
+    return steps
+
+
+def path(parents, person_id):
+    """
+    Returns the list of (movie_id, person_id) pairs from the root
+    of a parent map to the given person.
+    """
+    steps = []
+    while parents[person_id] is not None:
+        movie_id, parent_id = parents[person_id]
+        steps.append((movie_id, person_id))
+        person_id = parent_id
+    steps.reverse()
+    return steps
+
+
+def person_id_for_name(name, graph=None):
     """
     Returns the IMDB id for a person's name,
     resolving ambiguities as needed.
+
+    People are looked up in `graph` if given, a CompactGraph,
+    and in the data loaded by load_data otherwise.
     """
-    person_ids = list(names.get(name.lower(), set()))
+    if graph is None:
+        person_ids = list(names.get(name.lower(), set()))
+    else:
+        person_ids = graph.person_ids_for_name(name)
     if len(person_ids) == 0:
         return None
     elif len(person_ids) > 1:
         print(f"Which '{name}'?")
         for person_id in person_ids:
-            person = people[person_id]
+            if graph is None:
+                person = people[person_id]
+            else:
+                person = graph.person(person_id)
             name = person["name"]
             birth = person["birth"]
             print(f"ID: {person_id}, Name: {name}, Birth: {birth}")
@@ -160,5 +247,53 @@ def neighbors_for_person(person_id):
     return neighbors
 
 
+class CostarIndex():
+    """
+    Co-star adjacency index over the loaded data.
+
+    Maps person_ids to the (movie_id, person_id) pairs returned by
+    `neighbors_for_person`, computing them lazily and keeping at most
+    `maxsize` people (all of them if `maxsize` is None), evicting the
+    least recently used first. The index must be cleared if the data
+    is reloaded.
+    """
+
+    def __init__(self, maxsize=100000):
+        self.maxsize = maxsize
+        self.cache = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def neighbors(self, person_id):
+        """
+        Returns (movie_id, person_id) pairs for people
+        who starred with a given person.
+        """
+        try:
+            neighbors = self.cache[person_id]
+        except KeyError:
+            self.misses += 1
+            neighbors = tuple(neighbors_for_person(person_id))
+            self.cache[person_id] = neighbors
+            if self.maxsize is not None and len(self.cache) > self.maxsize:
+                self.cache.popitem(last=False)
+            return neighbors
+        self.hits += 1
+        self.cache.move_to_end(person_id)
+        return neighbors
+
+    def precompute(self, person_ids=None):
+        """
+        Fills the index for the given people, or for everyone.
+        """
+        for person_id in people if person_ids is None else person_ids:
+            self.neighbors(person_id)
+
+    def clear(self):
+        self.cache.clear()
+        self.hits = 0
+        self.misses = 0
+
+
 if __name__ == "__main__":
     main()
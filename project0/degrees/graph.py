@@ -0,0 +1,337 @@
+"""
+Compact, integer-indexed store of the degrees dataset.
+
+People and movies are interned to dense integer indexes and the
+person <-> movie bipartite graph is kept as two CSR adjacency lists
+(an offsets array plus a flat array of neighbor indexes per side).
+"""
+
+import bisect
+import csv
+import sys
+from array import array
+
+
+class StringTable():
+    """
+    Immutable sequence of strings packed into a single UTF-8 buffer.
+    """
+
+    def __init__(self, offsets, data):
+        self.offsets = offsets
+        self.data = data
+
+    @classmethod
+    def from_strings(cls, strings):
+        offsets = array("q", [0])
+        chunks = []
+        position = 0
+        for string in strings:
+            encoded = string.encode("utf-8")
+            chunks.append(encoded)
+            position += len(encoded)
+            offsets.append(position)
+        return cls(offsets, b"".join(chunks))
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, index):
+        return str(self.data[self.offsets[index]:self.offsets[index + 1]],
+                   "utf-8")
+
+    def nbytes(self):
+        return sys.getsizeof(self.offsets) + sys.getsizeof(self.data)
+
+
+class CompactGraph():
+    """
+    Person <-> movie graph with dense integer indexes.
+
+    Person `p` starred in movies
+    `person_movies[person_offsets[p]:person_offsets[p + 1]]`, and movie `m`
+    has stars `movie_stars[movie_offsets[m]:movie_offsets[m + 1]]`.
+    The `*_order` arrays hold indexes sorted by IMDb id (and, for people,
+    by lowercased name) so that lookups can binary search them.
+    """
+
+    def __init__(self, person_ids, names, births, movie_ids, titles, years,
+                 person_offsets, person_movies, movie_offsets, movie_stars,
+                 person_order, name_order, movie_order):
+        self.person_ids = person_ids
+        self.names = names
+        self.births = births
+        self.movie_ids = movie_ids
+        self.titles = titles
+        self.years = years
+        self.person_offsets = person_offsets
+        self.person_movies = person_movies
+        self.movie_offsets = movie_offsets
+        self.movie_stars = movie_stars
+        self.person_order = person_order
+        self.name_order = name_order
+        self.movie_order = movie_order
+
+        # Number of people expanded by searches, for benchmarking
+        self.expanded = 0
+
+    def person_index(self, person_id):
+        """
+        Returns the index of the person with the given IMDb id.
+        """
+        return self._find(self.person_order, self.person_ids, person_id)
+
+    def movie_index(self, movie_id):
+        """
+        Returns the index of the movie with the given IMDb id.
+        """
+        return self._find(self.movie_order, self.movie_ids, movie_id)
+
+    @staticmethod
+    def _find(order, table, key):
+        position = bisect.bisect_left(order, key, key=table.__getitem__)
+        if position == len(order) or table[order[position]] != key:
+            raise KeyError(key)
+        return order[position]
+
+    def person_ids_for_name(self, name):
+        """
+        Returns the list of IMDb ids of people with the given name,
+        ignoring case.
+        """
+        name = name.lower()
+
+        def key(index):
+            return self.names[index].lower()
+
+        start = bisect.bisect_left(self.name_order, name, key=key)
+        end = bisect.bisect_right(self.name_order, name, lo=start, key=key)
+        return [self.person_ids[index]
+                for index in self.name_order[start:end]]
+
+    def person(self, person_id):
+        """
+        Returns the name and birth year of a person.
+        """
+        index = self.person_index(person_id)
+        return {"name": self.names[index], "birth": self.births[index]}
+
+    def movie(self, movie_id):
+        """
+        Returns the title and year of a movie.
+        """
+        index = self.movie_index(movie_id)
+        return {"title": self.titles[index], "year": self.years[index]}
+
+    def neighbors_for_person(self, person_id):
+        """
+        Returns (movie_id, person_id) pairs for people
+        who starred with a given person.
+        """
+        index = self.person_index(person_id)
+        neighbors = set()
+        for movie in self.movies_of(index):
+            movie_id = self.movie_ids[movie]
+            for star in self.stars_of(movie):
+                neighbors.add((movie_id, self.person_ids[star]))
+        return neighbors
+
+    def shortest_path(self, source, target, bidirectional=False):
+        """
+        Returns the shortest list of (movie_id, person_id) pairs
+        that connect the source to the target.
+
+        If `bidirectional` is set, the search expands from both ends
+        and meets in the middle.
+
+        If no possible path, returns None.
+        """
+        steps = self.search(self.person_index(source),
+                            self.person_index(target), bidirectional)
+        if steps is None:
+            return None
+        return [(self.movie_ids[movie], self.person_ids[person])
+                for movie, person in steps]
+
+    def search(self, source, target, bidirectional=False):
+        """
+        Returns the shortest list of (movie, person) index pairs
+        that connect the source index to the target index,
+        or None if they are not connected.
+
+        Each movie is expanded at most once per side, since every star of
+        a movie is reached as soon as its first star is expanded.
+        """
+        if source == target:
+            return []
+        forward_parents = {source: None}
+        backward_parents = {target: None}
+        forward_movies = bytearray(len(self.movie_ids))
+        backward_movies = bytearray(len(self.movie_ids))
+        forward_frontier = [source]
+        backward_frontier = [target]
+
+        while forward_frontier and backward_frontier:
+            if (not bidirectional
+                    or len(forward_frontier) <= len(backward_frontier)):
+                forward_frontier, meeting = self._expand(
+                    forward_frontier, forward_parents, forward_movies,
+                    backward_parents)
+            else:
+                backward_frontier, meeting = self._expand(
+                    backward_frontier, backward_parents, backward_movies,
+                    forward_parents)
+            if meeting is not None:
+                return self._join(meeting, forward_parents, backward_parents)
+        return None
+
+    def _expand(self, frontier, parents, seen_movies, other_parents):
+        """
+        Expands one whole level of a breadth-first search.
+
+        Returns the next level and the first person also reached by the
+        other side of the search, if any.
+        """
+        next_frontier = []
+        for person in frontier:
+            self.expanded += 1
+            for movie in self.movies_of(person):
+                if seen_movies[movie]:
+                    continue
+                seen_movies[movie] = 1
+                for star in self.stars_of(movie):
+                    if star in parents:
+                        continue
+                    parents[star] = (movie, person)
+                    if star in other_parents:
+                        return next_frontier, star
+                    next_frontier.append(star)
+        return next_frontier, None
+
+    @staticmethod
+    def _join(meeting, forward_parents, backward_parents):
+        steps = []
+        person = meeting
+        while forward_parents[person] is not None:
+            movie, parent = forward_parents[person]
+            steps.append((movie, person))
+            person = parent
+        steps.reverse()
+
+        person = meeting
+        while backward_parents[person] is not None:
+            movie, child = backward_parents[person]
+            steps.append((movie, child))
+            person = child
+        return steps
+
+    def movies_of(self, person):
+        """
+        Returns the indexes of the movies a person index starred in.
+        """
+        return self.person_movies[
+            self.person_offsets[person]:self.person_offsets[person + 1]]
+
+    def stars_of(self, movie):
+        """
+        Returns the person indexes of the stars of a movie index.
+        """
+        return self.movie_stars[
+            self.movie_offsets[movie]:self.movie_offsets[movie + 1]]
+
+    def nbytes(self):
+        """
+        Returns the approximate memory footprint of the graph in bytes.
+        """
+        tables = [self.person_ids, self.names, self.births,
+                  self.movie_ids, self.titles, self.years]
+        arrays = [self.person_offsets, self.person_movies,
+                  self.movie_offsets, self.movie_stars,
+                  self.person_order, self.name_order, self.movie_order]
+        return (sum(table.nbytes() for table in tables)
+                + sum(sys.getsizeof(values) for values in arrays))
+
+
+def load_graph(directory):
+    """
+    Load data from CSV files into a CompactGraph.
+    """
+    # Load people
+    person_index = {}
+    person_ids, names, births = [], [], []
+    with open(f"{directory}/people.csv", encoding="utf-8") as f:
+        reader = csv.DictReader(f)
+        for row in reader:
+            if row["id"] in person_index:
+                continue
+            person_index[row["id"]] = len(person_ids)
+            person_ids.append(row["id"])
+            names.append(row["name"])
+            births.append(row["birth"])
+
+    # Load movies
+    movie_index = {}
+    movie_ids, titles, years = [], [], []
+    with open(f"{directory}/movies.csv", encoding="utf-8") as f:
+        reader = csv.DictReader(f)
+        for row in reader:
+            if row["id"] in movie_index:
+                continue
+            movie_index[row["id"]] = len(movie_ids)
+            movie_ids.append(row["id"])
+            titles.append(row["title"])
+            years.append(row["year"])
+
+    # Load stars, encoding each distinct (person, movie) edge as one integer
+    movie_count = len(movie_ids)
+    edges = set()
+    with open(f"{directory}/stars.csv", encoding="utf-8") as f:
+        reader = csv.DictReader(f)
+        for row in reader:
+            try:
+                person = person_index[row["person_id"]]
+                movie = movie_index[row["movie_id"]]
+            except KeyError:
+                continue
+            edges.add(person * movie_count + movie)
+    edges = sorted(edges)
+
+    person_offsets, person_movies = csr(
+        len(person_ids),
+        ((edge // movie_count, edge % movie_count) for edge in edges))
+    movie_offsets, movie_stars = csr(
+        movie_count,
+        ((edge % movie_count, edge // movie_count) for edge in edges))
+
+    return CompactGraph(
+        StringTable.from_strings(person_ids),
+        StringTable.from_strings(names),
+        StringTable.from_strings(births),
+        StringTable.from_strings(movie_ids),
+        StringTable.from_strings(titles),
+        StringTable.from_strings(years),
+        person_offsets, person_movies, movie_offsets, movie_stars,
+        array("i", sorted(range(len(person_ids)),
+                          key=person_ids.__getitem__)),
+        array("i", sorted(range(len(names)),
+                          key=lambda index: names[index].lower())),
+        array("i", sorted(range(movie_count), key=movie_ids.__getitem__)))
+
+
+def csr(count, pairs):
+    """
+    Returns the offsets and flat neighbor arrays of a CSR adjacency list
+    with `count` rows, built from (row, neighbor) pairs.
+    """
+    pairs = list(pairs)
+    offsets = array("i", bytes(4 * (count + 1)))
+    for row, _ in pairs:
+        offsets[row + 1] += 1
+    for row in range(count):
+        offsets[row + 1] += offsets[row]
+    neighbors = array("i", bytes(4 * len(pairs)))
+    positions = offsets[:-1]
+    for row, neighbor in pairs:
+        neighbors[positions[row]] = neighbor
+        positions[row] += 1
+    return offsets, neighbors
@@ -0,0 +1,121 @@
+"""
+Neighborhood and degree statistics on a CompactGraph.
+
+Searches here are level-synchronous: each step expands the whole frontier
+at once, first to the set of movies its people starred in and then to the
+set of their stars, so no per-person parent bookkeeping is needed.
+
+Usage: python neighborhood.py directory name [name ...] [-k depth]
+"""
+
+import argparse
+
+from snapshot import load_snapshot
+
+
+def person_indexes_for_names(graph, names):
+    """
+    Returns the indexes of everyone with one of the given names
+    or IMDb ids.
+
+    Raises ValueError if a name matches no one.
+    """
+    indexes = set()
+    for name in names:
+        person_ids = graph.person_ids_for_name(name) or [name]
+        for person_id in person_ids:
+            try:
+                indexes.add(graph.person_index(person_id))
+            except KeyError:
+                raise ValueError(f"person not found: {name}")
+    return indexes
+
+
+def levels(graph, sources, max_depth=None):
+    """
+    Yields the list of person indexes at each distance from the nearest
+    of the `sources` indexes, starting with the sources themselves at
+    distance 0, up to `max_depth` if given.
+    """
+    seen_people = bytearray(len(graph.person_ids))
+    seen_movies = bytearray(len(graph.movie_ids))
+    movies_of = graph.movies_of
+    stars_of = graph.stars_of
+
+    frontier = sorted(set(sources))
+    for person in frontier:
+        seen_people[person] = 1
+    depth = 0
+    while frontier:
+        yield frontier
+        if max_depth is not None and depth == max_depth:
+            return
+        depth += 1
+
+        movies = {movie for person in frontier for movie in movies_of(person)
+                  if not seen_movies[movie]}
+        for movie in movies:
+            seen_movies[movie] = 1
+        frontier = sorted({star for movie in movies for star in stars_of(movie)
+                           if not seen_people[star]})
+        for person in frontier:
+            seen_people[person] = 1
+
+
+def within(graph, names, k):
+    """
+    Returns, for each distance 0..k, the list of IMDb ids of people at that
+    many degrees from the nearest of the named people.
+    """
+    sources = person_indexes_for_names(graph, names)
+    return [[graph.person_ids[person] for person in level]
+            for level in levels(graph, sources, k)]
+
+
+def distance_counts(graph, names, max_depth=6):
+    """
+    Returns how many people sit at each distance 0..max_depth from the
+    nearest of the named people.
+    """
+    sources = person_indexes_for_names(graph, names)
+    return [len(level) for level in levels(graph, sources, max_depth)]
+
+
+def distance_histogram(graph, sources, max_depth=None):
+    """
+    Returns the number of (source, person) pairs at each distance, summed
+    over single-source searches from every index in `sources`.
+
+    Passing every person index gives the all-pairs distance distribution;
+    a random sample of indexes estimates it.
+    """
+    histogram = []
+    for source in sources:
+        for depth, level in enumerate(levels(graph, [source], max_depth)):
+            if depth == len(histogram):
+                histogram.append(0)
+            histogram[depth] += len(level)
+    return histogram
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("directory")
+    parser.add_argument("names", nargs="+")
+    parser.add_argument("-k", type=int, default=6, help="maximum distance")
+    parser.add_argument("--snapshot", metavar="PATH",
+                        help="graph snapshot file "
+                             "(default: graph.snapshot in the directory)")
+    args = parser.parse_args()
+
+    graph = load_snapshot(args.directory, args.snapshot)
+    try:
+        counts = distance_counts(graph, args.names, args.k)
+    except ValueError as e:
+        parser.exit(1, f"{e}\n")
+    for depth, count in enumerate(counts):
+        print(f"{depth}: {count}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+"""
+Binary snapshot cache of a CompactGraph.
+
+The snapshot is built once from the CSV files of a dataset directory and
+memory-mapped on later runs, so the arrays are paged in on demand rather
+than parsed. It is rebuilt whenever the size or modification time of any
+of the CSV files changes. The snapshot is only a cache: if it cannot be
+written, the graph is built from the CSV files in memory instead.
+"""
+
+import mmap
+import os
+import struct
+
+from graph import CompactGraph, StringTable, load_graph
+
+MAGIC = b"DEGREES1"
+SNAPSHOT_NAME = "graph.snapshot"
+SOURCES = ["people.csv", "movies.csv", "stars.csv"]
+
+# Graph attributes stored in a snapshot, in order; each string table
+# takes two sections, its offsets array and its UTF-8 buffer
+TABLES = ["person_ids", "names", "births", "movie_ids", "titles", "years"]
+ARRAYS = ["person_offsets", "person_movies", "movie_offsets", "movie_stars",
+          "person_order", "name_order", "movie_order"]
+SECTIONS = len(TABLES) * 2 + len(ARRAYS)
+
+# Item size of each section: 64-bit offsets and bytes for each string
+# table, then 32-bit integers for each array
+ITEM_SIZES = [8, 1] * len(TABLES) + [4] * len(ARRAYS)
+
+# Magic, then (mtime_ns, size) per source, then (offset, length) per section
+HEADER = struct.Struct(f"<8s{2 * len(SOURCES)}q{2 * SECTIONS}q")
+
+
+def source_stamp(directory):
+    """
+    Returns the (mtime_ns, size) pairs of the CSV files of a dataset.
+    """
+    stamp = []
+    for name in SOURCES:
+        stat = os.stat(os.path.join(directory, name))
+        stamp.extend([stat.st_mtime_ns, stat.st_size])
+    return stamp
+
+
+def sections(graph):
+    """
+    Returns the buffers of a graph in snapshot order.
+    """
+    buffers = []
+    for name in TABLES:
+        table = getattr(graph, name)
+        buffers.extend([table.offsets, table.data])
+    buffers.extend(getattr(graph, name) for name in ARRAYS)
+    return buffers
+
+
+def write_snapshot(graph, path, stamp):
+    """
+    Writes a graph to `path`, tagged with the stamp of its sources.
+    """
+    buffers = [memoryview(buffer).cast("B") for buffer in sections(graph)]
+    layout = []
+    position = HEADER.size
+    for buffer in buffers:
+        position += -position % 8
+        layout.extend([position, buffer.nbytes])
+        position += buffer.nbytes
+
+    temporary = f"{path}.{os.getpid()}.tmp"
+    try:
+        with open(temporary, "wb") as f:
+            f.write(HEADER.pack(MAGIC, *stamp, *layout))
+            for buffer, offset in zip(buffers, layout[::2]):
+                f.write(bytes(offset - f.tell()))
+                f.write(buffer)
+        os.replace(temporary, path)
+    except OSError:
+        try:
+            os.remove(temporary)
+        except OSError:
+            pass
+        raise
+
+
+def read_snapshot(path, stamp):
+    """
+    Memory-maps a snapshot and returns its graph,
+    or None if it is missing, malformed or out of date.
+    """
+    try:
+        with open(path, "rb") as f:
+            mapping = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError):
+        return None
+    if len(mapping) < HEADER.size:
+        return None
+    header = HEADER.unpack_from(mapping)
+    sources = header[1:1 + len(stamp)]
+    layout = header[1 + len(stamp):]
+    if header[0] != MAGIC or list(sources) != stamp:
+        return None
+    if any(offset < 0 or length < 0 or length % size
+           or offset + length > len(mapping)
+           for offset, length, size in zip(layout[::2], layout[1::2],
+                                           ITEM_SIZES)):
+        return None
+
+    view = memoryview(mapping)
+    buffers = [view[offset:offset + length]
+               for offset, length in zip(layout[::2], layout[1::2])]
+    tables = [StringTable(buffers[2 * i].cast("q"), buffers[2 * i + 1])
+              for i in range(len(TABLES))]
+    arrays = [buffer.cast("i") for buffer in buffers[2 * len(TABLES):]]
+    return CompactGraph(*tables, *arrays)
+
+
+def load_snapshot(directory, path=None):
+    """
+    Returns the CompactGraph of a dataset directory, reading it from its
+    snapshot at `path` (graph.snapshot in the directory by default) when
+    that is up to date and (re)building it otherwise.
+
+    If the snapshot cannot be written, returns the graph built in memory.
+    """
+    if path is None:
+        path = os.path.join(directory, SNAPSHOT_NAME)
+    stamp = source_stamp(directory)
+    graph = read_snapshot(path, stamp)
+    if graph is None:
+        graph = load_graph(directory)
+        try:
+            write_snapshot(graph, path, stamp)
+        except OSError:
+            return graph
+        graph = read_snapshot(path, stamp) or graph
+    return graph
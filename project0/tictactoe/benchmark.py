@@ -0,0 +1,234 @@
+"""
+Benchmarks for the tictactoe engine.
+
+Usage: python benchmark.py
+"""
+
+import os
+import random
+import time
+
+import bitboard
+import mnk
+import tictactoe as ttt
+
+
+def opening_positions():
+    """
+    Returns the empty board and every board after one or two moves.
+    """
+    boards = [ttt.initial_state()]
+    frontier = boards
+    for _ in range(2):
+        frontier = [ttt.result(board, action)
+                    for board in frontier for action in ttt.actions(board)]
+        boards = boards + frontier
+    return boards
+
+
+def run_minimax(boards, table):
+    """
+    Runs minimax on every board and returns the positions evaluated
+    and the total wall time.
+    """
+    ttt.counters["nodes"] = 0
+    start = time.perf_counter()
+    for board in boards:
+        ttt.minimax_with_value(board, table)
+    return ttt.counters["nodes"], time.perf_counter() - start
+
+
+def compare_tables(boards):
+    """
+    Compares minimax without a transposition table, with cold tables
+    with and without symmetry folding, and with a warm table.
+    """
+    unfolded = ttt.TranspositionTable(fold_symmetries=False)
+    folded = ttt.TranspositionTable()
+    runs = [
+        ("no table", False),
+        ("table", unfolded),
+        ("folded table", folded),
+        ("warm table", folded),
+    ]
+    print(f"{'search':<16}{'nodes':>12}{'seconds':>12}{'entries':>12}")
+    for name, table in runs:
+        nodes, elapsed = run_minimax(boards, table)
+        entries = len(table.values) if table else 0
+        print(f"{name:<16}{nodes:>12}{elapsed:>12.4f}{entries:>12}")
+
+
+def all_positions():
+    """
+    Returns every board reachable from the empty board.
+    """
+    boards = {}
+    frontier = [ttt.initial_state()]
+    while frontier:
+        board = frontier.pop()
+        key = str(board)
+        if key in boards:
+            continue
+        boards[key] = board
+        if not ttt.terminal(board):
+            frontier.extend(ttt.result(board, action)
+                            for action in ttt.actions(board))
+    return list(boards.values())
+
+
+def time_calls(function, arguments, repeat=5):
+    """
+    Returns the best time over `repeat` runs of calling `function`
+    on every argument tuple, in microseconds per call.
+    """
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for argument in arguments:
+            function(*argument)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best / len(arguments) * 1e6
+
+
+def compare_engines(boards):
+    """
+    Compares the list-based functions with the bitboard engine, both
+    through its list-of-lists adapters and on raw (xs, os) positions.
+    """
+    moves = [(board, min(ttt.actions(board))) for board in boards
+             if not ttt.terminal(board)]
+    positions = [bitboard.to_bits(board) for board in boards]
+    bit_moves = [(*bitboard.to_bits(board), 1 << (i * 3 + j))
+                 for board, (i, j) in moves]
+    single = [(board,) for board in boards]
+    rows = [
+        ("player", ttt.player, bitboard.player, single,
+         bitboard.x_to_move, positions),
+        ("actions", ttt.actions, bitboard.actions, single,
+         bitboard.moves, positions),
+        ("result", ttt.result, bitboard.result, moves,
+         bitboard.play, bit_moves),
+        ("winner", ttt.winner, bitboard.winner, single,
+         lambda xs, os: bitboard.has_won(xs) or bitboard.has_won(os),
+         positions),
+    ]
+    print(f"{'function':<12}{'lists us':>12}{'adapter us':>12}{'bits us':>12}")
+    for name, lists, adapter, arguments, bits, bit_arguments in rows:
+        print(f"{name:<12}{time_calls(lists, arguments):>12.3f}"
+              f"{time_calls(adapter, arguments):>12.3f}"
+              f"{time_calls(bits, bit_arguments):>12.3f}")
+
+    # Search rather than look the move up in the opening book
+    ttt.transposition_table.clear()
+    bitboard.scores.clear()
+    start = time.perf_counter()
+    ttt.minimax_with_value(ttt.initial_state())
+    lists = time.perf_counter() - start
+    start = time.perf_counter()
+    bitboard.minimax(bitboard.initial_state())
+    bits = time.perf_counter() - start
+    print(f"Cold solve: lists {lists:.4f}s, bits {bits:.4f}s.")
+
+
+def compare_board_sizes(sizes=((3, 3, 3), (4, 4, 3), (4, 4, 4),
+                                (5, 5, 4), (6, 6, 4)),
+                        time_limit=2):
+    """
+    Reports nodes per second and depth reached by the m,n,k engine
+    from the empty board of each (rows, columns, k) size.
+    """
+    print(f"{'m,n,k':<10}{'nodes':>12}{'nodes/s':>12}{'seconds':>10}"
+          f"{'value':>12}  move")
+    for rows, columns, k in sizes:
+        game = mnk.Game(rows, columns, k)
+        start = time.perf_counter()
+        action, value = game.minimax_with_value(
+            game.initial_state(), time_limit=time_limit)
+        elapsed = time.perf_counter() - start
+        print(f"{f'{rows},{columns},{k}':<10}{game.nodes:>12}"
+              f"{game.nodes / elapsed:>12.0f}{elapsed:>10.3f}"
+              f"{value:>12.6f}  {action}")
+
+
+def compare_book(boards):
+    """
+    Compares the worst and total latency of minimax over every
+    non-terminal board with the opening book and with a cold search.
+    """
+    boards = [board for board in boards if not ttt.terminal(board)]
+    print(f"{'minimax':<16}{'worst ms':>12}{'total s':>12}")
+    for name, book in [("book", None), ("cold search", b"")]:
+        ttt.book = book
+        ttt.transposition_table.clear()
+        worst = total = 0
+        for board in boards:
+            start = time.perf_counter()
+            ttt.minimax(board)
+            elapsed = time.perf_counter() - start
+            worst = max(worst, elapsed)
+            total += elapsed
+        print(f"{name:<16}{worst * 1000:>12.3f}{total:>12.4f}")
+    ttt.book = None
+
+
+def midgame_positions(game, count=6, moves=4, seed=0):
+    """
+    Returns `count` reproducible non-terminal boards reached by playing
+    `moves` random moves from the empty board.
+    """
+    generator = random.Random(seed)
+    boards = []
+    while len(boards) < count:
+        board = game.initial_state()
+        for _ in range(moves):
+            board = game.result(board, generator.choice(
+                sorted(game.actions(board))))
+        if not game.terminal(board):
+            boards.append(board)
+    return boards
+
+
+def compare_parallel(rows=4, columns=4, k=4, depth=7):
+    """
+    Reports the speedup of root-split search over a sequential search
+    of the same depth, on mid-game positions, for each worker count
+    up to the number of cores.
+    """
+    cores = os.cpu_count() or 1
+    counts = sorted({1, cores} | {2 ** i for i in range(cores.bit_length())})
+    boards = midgame_positions(mnk.Game(rows, columns, k))
+
+    game = mnk.Game(rows, columns, k)
+    start = time.perf_counter()
+    for board in boards:
+        game.minimax_with_value(board, depth)
+    sequential = time.perf_counter() - start
+    print(f"{f'{rows},{columns},{k} depth {depth}':<20}{'seconds':>10}"
+          f"{'speedup':>10}{'nodes':>12}")
+    print(f"{'sequential':<20}{sequential:>10.3f}{1:>10.2f}{game.nodes:>12}")
+    for workers in counts:
+        game = mnk.Game(rows, columns, k)
+        with mnk.RootSplitter(game, workers) as splitter:
+            start = time.perf_counter()
+            for board in boards:
+                splitter.minimax_with_value(board, depth)
+            elapsed = time.perf_counter() - start
+        print(f"{f'{workers} workers':<20}{elapsed:>10.3f}"
+              f"{sequential / elapsed:>10.2f}{game.nodes:>12}")
+
+
+def main():
+    boards = opening_positions()
+    print(f"{len(boards)} opening positions")
+    compare_tables(boards)
+    boards = all_positions()
+    print(f"{len(boards)} reachable positions")
+    compare_engines(boards)
+    compare_book(boards)
+    compare_board_sizes()
+    compare_parallel()
+
+
+if __name__ == "__main__":
+    main()
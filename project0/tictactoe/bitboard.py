@@ -0,0 +1,209 @@
+"""
+Tic Tac Toe Player on bitboards
+
+A position is a pair of 9-bit integers (xs, os) with bit i * 3 + j set when
+X, respectively O, holds cell (i, j). The functions taking a `board` keep
+the list-of-lists API of tictactoe.py, so `import bitboard as ttt` is a
+drop-in replacement for runner.py.
+"""
+
+X = "X"
+O = "O"
+EMPTY = None
+
+FULL = 0b111111111
+
+# Every row, column and diagonal as a mask of cell bits
+WIN_MASKS = (
+    [0b111 << (3 * i) for i in range(3)]
+    + [0b1001001 << j for j in range(3)]
+    + [0b100010001, 0b001010100]
+)
+
+# Whether each of the 512 possible sets of cells contains a line
+WINNING = [any(bits & mask == mask for mask in WIN_MASKS)
+           for bits in range(FULL + 1)]
+
+# Single-cell masks and their (i, j) actions
+CELLS = [(1 << (i * 3 + j), (i, j)) for i in range(3) for j in range(3)]
+
+# Maps positions (xs, os) to their minimax score
+scores = {}
+
+
+def to_bits(board):
+    """
+    Returns the (xs, os) position of a list-of-lists board.
+    """
+    xs = os = 0
+    for bit, (i, j) in CELLS:
+        if board[i][j] == X:
+            xs |= bit
+        elif board[i][j] == O:
+            os |= bit
+    return xs, os
+
+
+def to_board(xs, os):
+    """
+    Returns the list-of-lists board of an (xs, os) position.
+    """
+    return [[X if xs >> (i * 3 + j) & 1 else O if os >> (i * 3 + j) & 1
+             else EMPTY for j in range(3)] for i in range(3)]
+
+
+def x_to_move(xs, os):
+    """
+    Returns True if X has the next turn in a position.
+    """
+    return xs.bit_count() == os.bit_count()
+
+
+def moves(xs, os):
+    """
+    Returns the bits of the empty cells.
+    """
+    return FULL & ~(xs | os)
+
+
+def play(xs, os, bit):
+    """
+    Returns the position after the player to move takes the cell `bit`.
+    """
+    if x_to_move(xs, os):
+        return xs | bit, os
+    return xs, os | bit
+
+
+def has_won(bits):
+    """
+    Returns True if the cells in `bits` cover a row, column or diagonal.
+    """
+    return WINNING[bits]
+
+
+def score(xs, os):
+    """
+    Returns the minimax score of a position: 0 for a draw and, for a
+    win, one more than the number of cells still empty when it happens,
+    positive if X wins under optimal play and negative if O does, so
+    that faster wins score higher.
+    """
+    if (xs, os) in scores:
+        return scores[(xs, os)]
+    empty = moves(xs, os)
+    if has_won(xs):
+        result = empty.bit_count() + 1
+    elif has_won(os):
+        result = -empty.bit_count() - 1
+    elif not empty:
+        result = 0
+    else:
+        maximizing = x_to_move(xs, os)
+
+        # Winning with the next move is the best possible score
+        best = empty.bit_count() if maximizing else -empty.bit_count()
+        result = None
+        while empty:
+            bit = empty & -empty
+            empty ^= bit
+            child = score(*play(xs, os, bit))
+            if (result is None
+                    or (child > result if maximizing else child < result)):
+                result = child
+            if result == best:
+                break
+    scores[(xs, os)] = result
+    return result
+
+
+def value(xs, os):
+    """
+    Returns the minimax value of a position: 1 if X wins under optimal
+    play, -1 if O does, 0 for a draw.
+    """
+    result = score(xs, os)
+    return (result > 0) - (result < 0)
+
+
+def initial_state():
+    """
+    Returns starting state of the board.
+    """
+    return to_board(0, 0)
+
+
+def player(board):
+    """
+    Returns player who has the next turn on a board.
+    """
+    return X if x_to_move(*to_bits(board)) else O
+
+
+def actions(board):
+    """
+    Returns set of all possible actions (i, j) available on the board.
+    """
+    empty = moves(*to_bits(board))
+    return {action for bit, action in CELLS if empty & bit}
+
+
+def result(board, action):
+    """
+    Returns the board that results from making move (i, j) on the board.
+    """
+    i, j = action
+    if not (0 <= i < 3 and 0 <= j < 3):
+        raise ValueError("Action out of bounds")
+    xs, os = to_bits(board)
+    bit = 1 << (i * 3 + j)
+    if not moves(xs, os) & bit:
+        raise ValueError("Action is not valid for board")
+    return to_board(*play(xs, os, bit))
+
+
+def winner(board):
+    """
+    Returns the winner of the game, if there is one.
+    """
+    xs, os = to_bits(board)
+    if has_won(xs):
+        return X
+    if has_won(os):
+        return O
+    return None
+
+
+def terminal(board):
+    """
+    Returns True if game is over, False otherwise.
+    """
+    xs, os = to_bits(board)
+    return has_won(xs) or has_won(os) or xs | os == FULL
+
+
+def utility(board):
+    """
+    Returns 1 if X has won the game, -1 if O has won, 0 otherwise.
+    """
+    xs, os = to_bits(board)
+    return 1 if has_won(xs) else -1 if has_won(os) else 0
+
+
+def minimax(board):
+    """
+    Returns the optimal action for the current player on the board.
+    """
+    xs, os = to_bits(board)
+    if has_won(xs) or has_won(os) or xs | os == FULL:
+        return None
+    maximizing = x_to_move(xs, os)
+    best_action, best_score = None, None
+    for bit, action in CELLS:
+        if not moves(xs, os) & bit:
+            continue
+        child = score(*play(xs, os, bit))
+        if (best_score is None
+                or (child > best_score if maximizing else child < best_score)):
+            best_action, best_score = action, child
+    return best_action
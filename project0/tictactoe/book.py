@@ -0,0 +1,58 @@
+"""
+Opening book generator for tictactoe
+
+Solves every position reachable from the empty board with
+tictactoe.minimax_with_value and writes the best move and value of each
+to a table indexed by tictactoe.board_key, one byte per position.
+
+Usage: python book.py [output]
+"""
+
+import sys
+
+import tictactoe as ttt
+
+
+def solve_all():
+    """
+    Returns a dict mapping the key of every reachable board
+    to its (action, value).
+    """
+    solutions = {}
+    frontier = [ttt.initial_state()]
+    while frontier:
+        board = frontier.pop()
+        key = ttt.board_key(board)
+        if key in solutions:
+            continue
+        solutions[key] = ttt.minimax_with_value(board)
+        if not ttt.terminal(board):
+            frontier.extend(ttt.result(board, action)
+                            for action in ttt.actions(board))
+    return solutions
+
+
+def build_book(solutions):
+    """
+    Returns the book bytes for a dict of solutions.
+    """
+    book = bytearray([ttt.UNKNOWN]) * 3 ** 9
+    for key, (action, value) in solutions.items():
+        move = ttt.NO_MOVE if action is None else action[0] * 3 + action[1]
+        book[key] = (value + 1) << 4 | move
+    return bytes(book)
+
+
+def main():
+    if len(sys.argv) > 2:
+        sys.exit("Usage: python book.py [output]")
+    output = sys.argv[1] if len(sys.argv) == 2 else ttt.BOOK_PATH
+
+    solutions = solve_all()
+    with open(output, "wb") as f:
+        f.write(build_book(solutions))
+    print(f"Wrote {len(solutions)} positions to {output}.")
+
+
+if __name__ == "__main__":
+    main()
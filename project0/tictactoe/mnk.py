@@ -0,0 +1,442 @@
+"""
+m,n,k-game Player
+
+Generalizes tictactoe.py to boards of `rows` x `columns` cells where `k`
+in a row, column or diagonal wins. Positions are searched as bitboards
+with alpha-beta pruning, a transposition table, move ordering and
+iterative deepening under an optional time budget; positions cut off by
+the depth limit are scored by a pluggable heuristic.
+
+Boards passed in and out keep the list-of-lists API of tictactoe.py.
+"""
+
+import math
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+X = "X"
+O = "O"
+EMPTY = None
+
+# Least score of a won position, from the winner's point of view; each
+# Game raises it to its `win` above any open_lines score of its board,
+# and heuristic scores must stay well inside (-game.win, game.win)
+WIN = 1000000
+
+# Transposition table entry flags
+EXACT, LOWER, UPPER = 0, 1, 2
+
+
+class Timeout(Exception):
+    """
+    Raised inside a search when its time budget runs out.
+    """
+
+
+def open_lines(game, xs, os):
+    """
+    Default heuristic, scoring a position from X's point of view.
+
+    Every line of k cells still open to only one player counts for that
+    player, weighted by 4 to the number of its cells they already hold.
+    """
+    score = 0
+    for mask in game.lines:
+        x = xs & mask
+        o = os & mask
+        if x and not o:
+            score += 4 ** x.bit_count()
+        elif o and not x:
+            score -= 4 ** o.bit_count()
+    return score
+
+
+def scaled(value, x_to_move, win=WIN):
+    """
+    Returns a search value for the player to move from X's point of view,
+    as 1 or -1 for forced wins and a fraction of `win` otherwise.
+    """
+    if not x_to_move:
+        value = -value
+    if value >= win:
+        return 1
+    if value <= -win:
+        return -1
+    return value / win
+
+
+class Game():
+    """
+    m,n,k-game engine for one board size and heuristic.
+
+    `nodes` counts the positions searched and `table` maps searched
+    positions, as (to move, other) bitboards, to
+    (depth, value, flag, best cell); both persist across calls.
+    """
+
+    def __init__(self, rows=3, columns=3, k=3, heuristic=open_lines):
+        if not 0 < k <= max(rows, columns):
+            raise ValueError("k must fit on the board")
+        self.rows = rows
+        self.columns = columns
+        self.k = k
+        self.heuristic = heuristic
+        self.full = (1 << rows * columns) - 1
+        self.lines = self._lines()
+        self.lines_through = [
+            [mask for mask in self.lines if mask >> cell & 1]
+            for cell in range(rows * columns)
+        ]
+
+        # Score of a won position, well above the largest open_lines
+        # score, every line holding k - 1 cells of one player
+        self.win = max(WIN, 4 * len(self.lines) * 4 ** (k - 1))
+
+        # Cells from the center outwards, the default move order
+        self.order = sorted(
+            range(rows * columns),
+            key=lambda cell: (abs(cell // columns - (rows - 1) / 2)
+                              + abs(cell % columns - (columns - 1) / 2)))
+
+        self.table = {}
+        self.nodes = 0
+
+    def _lines(self):
+        """
+        Returns the mask of every run of k cells in a row, column
+        or diagonal.
+        """
+        lines = []
+        for i in range(self.rows):
+            for j in range(self.columns):
+                for di, dj in [(0, 1), (1, 0), (1, 1), (1, -1)]:
+                    end_i = i + di * (self.k - 1)
+                    end_j = j + dj * (self.k - 1)
+                    if not (0 <= end_i < self.rows
+                            and 0 <= end_j < self.columns):
+                        continue
+                    mask = 0
+                    for step in range(self.k):
+                        cell = (i + di * step) * self.columns + j + dj * step
+                        mask |= 1 << cell
+                    lines.append(mask)
+        return lines
+
+    def to_bits(self, board):
+        """
+        Returns the (xs, os) bitboards of a list-of-lists board.
+        """
+        xs = os = 0
+        for i, row in enumerate(board):
+            for j, cell in enumerate(row):
+                if cell == X:
+                    xs |= 1 << (i * self.columns + j)
+                elif cell == O:
+                    os |= 1 << (i * self.columns + j)
+        return xs, os
+
+    def to_board(self, xs, os):
+        """
+        Returns the list-of-lists board of (xs, os) bitboards.
+        """
+        board = []
+        for i in range(self.rows):
+            row = []
+            for j in range(self.columns):
+                bit = 1 << (i * self.columns + j)
+                row.append(X if xs & bit else O if os & bit else EMPTY)
+            board.append(row)
+        return board
+
+    def has_line(self, bits):
+        """
+        Returns True if the cells in `bits` cover a line of k cells.
+        """
+        return any(bits & mask == mask for mask in self.lines)
+
+    def initial_state(self):
+        """
+        Returns starting state of the board.
+        """
+        return self.to_board(0, 0)
+
+    def player(self, board):
+        """
+        Returns player who has the next turn on a board.
+        """
+        xs, os = self.to_bits(board)
+        return X if xs.bit_count() == os.bit_count() else O
+
+    def actions(self, board):
+        """
+        Returns set of all possible actions (i, j) available on the board.
+        """
+        return {(i, j) for i, row in enumerate(board)
+                for j, cell in enumerate(row) if cell is EMPTY}
+
+    def result(self, board, action):
+        """
+        Returns the board that results from making move (i, j) on the board.
+        """
+        i, j = action
+        if not (0 <= i < self.rows and 0 <= j < self.columns):
+            raise ValueError("Action out of bounds")
+        if board[i][j] is not EMPTY:
+            raise ValueError("Action is not valid for board")
+        new_board = [list(row) for row in board]
+        new_board[i][j] = self.player(board)
+        return new_board
+
+    def winner(self, board):
+        """
+        Returns the winner of the game, if there is one.
+        """
+        xs, os = self.to_bits(board)
+        if self.has_line(xs):
+            return X
+        if self.has_line(os):
+            return O
+        return None
+
+    def terminal(self, board):
+        """
+        Returns True if game is over, False otherwise.
+        """
+        xs, os = self.to_bits(board)
+        return (self.has_line(xs) or self.has_line(os)
+                or xs | os == self.full)
+
+    def utility(self, board):
+        """
+        Returns 1 if X has won the game, -1 if O has won, 0 otherwise.
+        """
+        winner = self.winner(board)
+        return 1 if winner == X else -1 if winner == O else 0
+
+    def minimax(self, board, depth=None, time_limit=None):
+        """
+        Returns the optimal action for the current player on the board.
+        """
+        action, value = self.minimax_with_value(board, depth, time_limit)
+        return action
+
+    def minimax_with_value(self, board, depth=None, time_limit=None):
+        """
+        Returns the best action found for the current player on the board,
+        together with its value from X's point of view: 1 or -1 for a
+        forced win for X or O, 0 for a draw, and the heuristic score
+        divided by `win` when the search was cut off before the end.
+
+        Searches one more ply at a time up to `depth` plies (the rest of
+        the game by default) and, given a `time_limit` in seconds, returns
+        the result of the deepest search completed within it. The first
+        ply is always searched in full.
+
+        Raises ValueError if `depth` is less than 1.
+        """
+        if depth is not None and depth < 1:
+            raise ValueError("depth must be at least 1")
+        if self.terminal(board):
+            return None, self.utility(board)
+        xs, os = self.to_bits(board)
+        x_to_move = xs.bit_count() == os.bit_count()
+        me, them = (xs, os) if x_to_move else (os, xs)
+        empties = (self.full & ~(xs | os)).bit_count()
+        max_depth = empties if depth is None else min(depth, empties)
+        deadline = None
+        if time_limit is not None:
+            deadline = time.perf_counter() + time_limit
+
+        best = None
+        for current_depth in range(1, max_depth + 1):
+            try:
+                value = self.negamax(me, them, current_depth,
+                                     -math.inf, math.inf,
+                                     deadline if best else None)
+            except Timeout:
+                break
+            best = (self.table[(me, them)][3], value)
+            if abs(value) >= self.win:
+                break
+
+        cell, value = best
+        return divmod(cell, self.columns), scaled(value, x_to_move,
+                                                  self.win)
+
+    def negamax(self, me, them, depth, alpha, beta, deadline):
+        """
+        Returns the alpha-beta value of a position for the player to move,
+        whose cells are `me`, searching `depth` plies deep.
+
+        Wins score `win` plus the number of empty cells left, so that
+        faster wins are preferred.
+        """
+        self.nodes += 1
+        if (deadline is not None and self.nodes % 1024 == 0
+                and time.perf_counter() > deadline):
+            raise Timeout
+
+        key = (me, them)
+        best_cell = None
+        entry = self.table.get(key)
+        if entry is not None:
+            entry_depth, value, flag, best_cell = entry
+            if entry_depth >= depth:
+                if flag == EXACT:
+                    return value
+                if flag == LOWER:
+                    alpha = max(alpha, value)
+                else:
+                    beta = min(beta, value)
+                if alpha >= beta:
+                    return value
+
+        empty = self.full & ~(me | them)
+        if depth == 0:
+            if me.bit_count() == them.bit_count():
+                return self.heuristic(self, me, them)
+            return -self.heuristic(self, them, me)
+
+        original_alpha = alpha
+        best = -math.inf
+        for cell in self.ordered(empty, best_cell):
+            bit = 1 << cell
+            mine = me | bit
+            if any(mine & mask == mask for mask in self.lines_through[cell]):
+                value = self.win + (empty ^ bit).bit_count()
+            elif empty == bit:
+                value = 0
+            else:
+                value = -self.negamax(them, mine, depth - 1,
+                                      -beta, -alpha, deadline)
+            if value > best:
+                best, best_cell = value, cell
+            alpha = max(alpha, value)
+            if alpha >= beta:
+                break
+
+        if best <= original_alpha:
+            flag = UPPER
+        elif best >= beta:
+            flag = LOWER
+        else:
+            flag = EXACT
+        self.table[key] = (depth, best, flag, best_cell)
+        return best
+
+    def ordered(self, empty, first=None):
+        """
+        Returns the empty cells in search order: `first`, typically the
+        best cell of an earlier search, then from the center outwards.
+        """
+        cells = [cell for cell in self.order if empty >> cell & 1]
+        if first is not None and empty >> first & 1:
+            cells.remove(first)
+            cells.insert(0, first)
+        return cells
+
+
+class RootSplitter():
+    """
+    Searches the root moves of a Game in parallel, one subtree per task
+    on a pool of worker processes.
+
+    Workers share the best exact root value found so far, and search
+    each later subtree with it as their alpha bound, so that subtrees
+    that cannot beat it are cut off early. Each worker keeps its own
+    transposition table across calls.
+    """
+
+    def __init__(self, game, workers=None):
+        self.game = game
+        self.alpha = multiprocessing.Value("d", -math.inf)
+        self.executor = ProcessPoolExecutor(
+            max_workers=workers, initializer=init_worker,
+            initargs=(game.rows, game.columns, game.k, game.heuristic,
+                      self.alpha))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def close(self):
+        self.executor.shutdown()
+
+    def minimax_with_value(self, board, depth=None):
+        """
+        Returns the best action for the current player on the board and
+        its value, as Game.minimax_with_value does, searching `depth`
+        plies deep (the rest of the game by default) without deepening.
+
+        Raises ValueError if `depth` is less than 1.
+        """
+        if depth is not None and depth < 1:
+            raise ValueError("depth must be at least 1")
+        game = self.game
+        if game.terminal(board):
+            return None, game.utility(board)
+        xs, os = game.to_bits(board)
+        x_to_move = xs.bit_count() == os.bit_count()
+        me, them = (xs, os) if x_to_move else (os, xs)
+        empty = game.full & ~(xs | os)
+        if depth is None:
+            depth = empty.bit_count()
+
+        self.alpha.value = -math.inf
+        futures = [self.executor.submit(search_root_move, me, them, cell,
+                                        depth)
+                   for cell in game.ordered(empty)]
+        best_cell, best = None, -math.inf
+        for future in as_completed(futures):
+            cell, value, exact, nodes = future.result()
+            game.nodes += nodes
+            if exact and value > best:
+                best_cell, best = cell, value
+        return divmod(best_cell, game.columns), scaled(best, x_to_move,
+                                                       game.win)
+
+
+# Game and shared root bound of a RootSplitter worker process
+worker_game = None
+worker_alpha = None
+
+
+def init_worker(rows, columns, k, heuristic, alpha):
+    global worker_game, worker_alpha
+    worker_game = Game(rows, columns, k, heuristic)
+    worker_alpha = alpha
+
+
+def search_root_move(me, them, cell, depth):
+    """
+    Returns the cell, the value of playing it for the player to move,
+    whether that value is exact rather than an upper bound, and the
+    number of nodes searched.
+
+    Values that fail low against the shared alpha bound are only upper
+    bounds, and are never reported as the best move.
+    """
+    game = worker_game
+    nodes = game.nodes
+    bit = 1 << cell
+    mine = me | bit
+    empty = game.full & ~(mine | them)
+    if any(mine & mask == mask for mask in game.lines_through[cell]):
+        value, exact = game.win + empty.bit_count(), True
+    elif not empty or depth <= 1:
+        value = 0 if not empty else -game.negamax(
+            them, mine, 0, -math.inf, math.inf, None)
+        exact = True
+    else:
+        alpha = worker_alpha.value
+        value = -game.negamax(them, mine, depth - 1,
+                              -math.inf, -alpha, None)
+        exact = value > alpha
+    if exact:
+        with worker_alpha.get_lock():
+            if value > worker_alpha.value:
+                worker_alpha.value = value
+    return cell, value, exact, game.nodes - nodes
@@ -0,0 +1,87 @@
+"""
+Tests that every engine chooses moves as well as the original player.
+
+Usage: python -m pytest test_tictactoe.py
+"""
+
+import pytest
+
+import bitboard
+import tictactoe as ttt
+
+# Original minimax values, by board key
+baseline_values = {}
+
+
+def baseline_minimax_with_value(board):
+    """
+    Returns the move and value of the original player, which takes a win
+    at once when it has one, and otherwise the first move reaching the
+    best value.
+    """
+    if ttt.terminal(board):
+        return None, ttt.utility(board)
+    next_player = ttt.player(board)
+    new_boards = {}
+    for action in ttt.actions(board):
+        new_board = ttt.result(board, action)
+        if ttt.winner(new_board) == next_player:
+            return action, ttt.utility(new_board)
+        new_boards[action] = new_board
+    next_actions = [(action, baseline_value(new_board))
+                    for action, new_board in new_boards.items()]
+    values = [value for action, value in next_actions]
+    goal = max(values) if next_player == ttt.X else min(values)
+    action = next(action for action, value in next_actions if value == goal)
+    return action, goal
+
+
+def baseline_value(board):
+    key = ttt.board_key(board)
+    if key not in baseline_values:
+        baseline_values[key] = baseline_minimax_with_value(board)[1]
+    return baseline_values[key]
+
+
+def reachable_boards():
+    """
+    Returns every non-terminal board reachable from the empty board.
+    """
+    boards = {}
+    frontier = [ttt.initial_state()]
+    while frontier:
+        board = frontier.pop()
+        key = ttt.board_key(board)
+        if key in boards or ttt.terminal(board):
+            continue
+        boards[key] = board
+        frontier.extend(ttt.result(board, action)
+                        for action in ttt.actions(board))
+    return list(boards.values())
+
+
+ENGINES = {
+    "search": lambda board: ttt.minimax_with_value(board)[0],
+    "book": ttt.minimax,
+    "bitboard": bitboard.minimax
+}
+
+
+@pytest.mark.parametrize("engine", ENGINES)
+def test_moves_match_baseline(engine):
+    minimax = ENGINES[engine]
+    for board in reachable_boards():
+        expected, value = baseline_minimax_with_value(board)
+        action = minimax(board)
+        new_board = ttt.result(board, action)
+        assert baseline_value(new_board) == value, (board, action)
+        if ttt.winner(ttt.result(board, expected)) is not None:
+            assert ttt.winner(new_board) is not None, (board, action)
+
+
+@pytest.mark.parametrize("engine", ENGINES)
+def test_takes_immediate_win(engine):
+    board = [[ttt.O, ttt.X, ttt.EMPTY],
+             [ttt.EMPTY, ttt.O, ttt.X],
+             [ttt.EMPTY, ttt.X, ttt.EMPTY]]
+    assert ENGINES[engine](board) == (2, 2)
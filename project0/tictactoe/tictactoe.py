@@ -4,6 +4,7 @@ Tic Tac Toe Player
 
 import copy
 import math
+import os
 
 X = "X"
 O = "O"
@@ -103,30 +104,180 @@ def minimax(board):
     """
     Returns the optimal action for the current player on the board.
     """
+    entry = book_entry(board)
+    if entry is not None:
+        return entry[0]
     action, value = minimax_with_value(board)
     return action
 
 
-def minimax_with_value(board):
+def book_entry(board):
+    """
+    Returns the (action, value) stored for the board in the opening book,
+    or None if the book is unavailable or does not cover the board.
+
+    The book, written by book.py, holds one byte per base-3 board key:
+    the best move i * 3 + j (NO_MOVE on terminal boards) in the low four
+    bits and the value plus one above them, or UNKNOWN.
+    """
+    global book
+    if book is None:
+        try:
+            with open(BOOK_PATH, "rb") as f:
+                book = f.read()
+        except OSError:
+            book = b""
+        if len(book) != 3 ** 9:
+            book = b""
+    if not book:
+        return None
+    entry = book[board_key(board)]
+    if entry == UNKNOWN:
+        return None
+    move = entry & 0x0F
+    action = None if move == NO_MOVE else divmod(move, 3)
+    return action, (entry >> 4) - 1
+
+
+def minimax_with_value(board, table=None):
+    """
+    Returns the optimal action for the current player on the board,
+    together with the value of the board under optimal play.
+
+    Values are memoized in `table`, the shared transposition table
+    unless another one is given. Pass False to search without one.
+    """
+    if table is None:
+        table = transposition_table
     if terminal(board):
         return None, utility(board)
+
+    # Take a win at once when there is one, since a forced win further
+    # off is worth as much to the search below
     next_player = player(board)
-    new_boards = {}
-    all_actions = actions(board)
-    if len(all_actions) == 1:
-        remaining_action = all_actions.pop()
-        return remaining_action, utility(result(board, remaining_action))
-    for action in all_actions:
+    for action in sorted(actions(board)):
         new_board = result(board, action)
         if winner(new_board) == next_player:
             return action, utility(new_board)
-        new_boards[action] = new_board
-    next_actions = [(action, minimax_with_value(new_board)[1])
-                    for (action, new_board) in new_boards.items()]
-    next_values = [next_action[1] for next_action in next_actions]
-    if next_player == X:
-        goal_value = max(next_values)
+
+    maximizing = next_player == X
+    best = 1 if maximizing else -1
+    best_action, best_value = None, None
+    for action in sorted(actions(board)):
+        value = board_value(result(board, action), table)
+        if (best_value is None
+                or (value > best_value if maximizing else value < best_value)):
+            best_action, best_value = action, value
+        if best_value == best:
+            break
+    return best_action, best_value
+
+
+def board_value(board, table):
+    """
+    Returns the minimax value of the board, looking it up in
+    and adding it to `table` unless that is False.
+    """
+    counters["nodes"] += 1
+    if table:
+        key = table.key(board)
+        if key in table.values:
+            table.hits += 1
+            return table.values[key]
+        table.misses += 1
+    if terminal(board):
+        value = utility(board)
     else:
-        goal_value = min(next_values)
-    outcomes = [next_action[0] for next_action in next_actions if next_action[1] == goal_value]
-    return outcomes[0], goal_value
+        maximizing = player(board) == X
+        best = 1 if maximizing else -1
+
+        # Stop as soon as a child reaches the best possible value
+        value = None
+        for action in actions(board):
+            child_value = board_value(result(board, action), table)
+            if (value is None
+                    or (child_value > value if maximizing
+                        else child_value < value)):
+                value = child_value
+            if value == best:
+                break
+    if table:
+        table.values[key] = value
+    return value
+
+
+class TranspositionTable():
+    """
+    Cache of minimax values keyed by a base-3 encoding of the board.
+
+    With `fold_symmetries`, the 8 rotations and reflections of a board
+    share one entry, keyed by the smallest of their encodings.
+    """
+
+    def __init__(self, fold_symmetries=True):
+        self.fold_symmetries = fold_symmetries
+        self.values = {}
+        self.hits = 0
+        self.misses = 0
+
+    def key(self, board):
+        if not self.fold_symmetries:
+            return board_key(board)
+        cells = [CODES[cell] for row in board for cell in row]
+        return min(encode([cells[i] for i in symmetry])
+                   for symmetry in SYMMETRIES)
+
+    def clear(self):
+        self.values.clear()
+        self.hits = 0
+        self.misses = 0
+
+
+def board_key(board):
+    """
+    Returns the base-3 encoding of the board, without folding symmetries.
+    """
+    return encode(CODES[cell] for row in board for cell in row)
+
+
+def encode(cells):
+    """
+    Returns the base-3 number whose digits are the given cell codes.
+    """
+    key = 0
+    for code in cells:
+        key = key * 3 + code
+    return key
+
+
+def symmetries():
+    """
+    Returns the 8 rotations and reflections of the board,
+    each as a permutation of the flattened cell indexes.
+    """
+    permutations = []
+    cells = [[i * 3 + j for j in range(3)] for i in range(3)]
+    for _ in range(4):
+        cells = [list(row) for row in zip(*cells[::-1])]
+        permutations.append([cell for row in cells for cell in row])
+        permutations.append([cell for row in cells for cell in row[::-1]])
+    return permutations
+
+
+CODES = {EMPTY: 0, X: 1, O: 2}
+
+# Opening book file and the markers used in its entries
+BOOK_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                         "book.bin")
+NO_MOVE = 0x0F
+UNKNOWN = 0xFF
+
+# Contents of the opening book, read on first use; empty if unavailable
+book = None
+SYMMETRIES = symmetries()
+
+# Shared transposition table, so the game is solved once per process
+transposition_table = TranspositionTable()
+
+# Number of positions evaluated by board_value, for instrumentation
+counters = {"nodes": 0}
@@ -0,0 +1,179 @@
+"""
+Benchmarks for the logic model checking backends.
+
+Usage: python benchmark.py [repeat]
+"""
+
+import sys
+import time
+import tracemalloc
+
+from logic import (And, Biconditional, Implication, Not, Or, Sentence,
+                   Symbol, model_check, model_check_all)
+from puzzle import (AKnight, AKnave, BKnight, BKnave, CKnight, CKnave,
+                    knowledge0, knowledge1, knowledge2, knowledge3)
+
+SYMBOLS = [AKnight, AKnave, BKnight, BKnave, CKnight, CKnave]
+PUZZLES = [knowledge0, knowledge1, knowledge2, knowledge3]
+
+# Backends run on scaled-up puzzles, with the most symbols they can take
+# in reasonable time
+SCALED_BACKENDS = [("enumerate", 50), ("compiled", 28), ("sat", 1000)]
+
+
+def scaled_puzzle(characters):
+    """
+    Returns the symbols and knowledge base of a knights puzzle with
+    `characters` people, which has a unique solution.
+
+    Person 0 says "We are both knaves." about person 1, every odd person
+    says "The previous person is a knave or the next one is a knight."
+    and every other even person says "The previous person is a knave."
+    """
+    knights = [Symbol(f"{i} is a Knight") for i in range(characters)]
+    knaves = [Symbol(f"{i} is a Knave") for i in range(characters)]
+    knowledge = [Biconditional(knight, Not(knave))
+                 for knight, knave in zip(knights, knaves)]
+
+    def says(i, statement):
+        knowledge.append(Implication(knights[i], statement))
+        knowledge.append(Implication(knaves[i], Not(statement)))
+
+    says(0, And(knaves[0], knaves[1]))
+    for i in range(1, characters):
+        if i % 2:
+            says(i, Or(knaves[i - 1], knights[(i + 1) % characters]))
+        else:
+            says(i, knaves[i - 1])
+    return knights + knaves, And(*knowledge)
+
+
+def exactly_one(symbols):
+    """
+    Returns the sentence that exactly one of the symbols is true, spelled
+    out as one conjunction per symbol, so that every negated symbol is
+    built over and over.
+    """
+    return Or(*[And(symbol, *[Not(other) for other in symbols
+                              if other is not symbol])
+                for symbol in symbols])
+
+
+def distinct(sentence):
+    """
+    Returns the number of distinct sentence objects a sentence is made of.
+    """
+    seen = {id(sentence)}
+    stack = [sentence]
+    while stack:
+        for operand in stack.pop().operands():
+            if id(operand) not in seen:
+                seen.add(id(operand))
+                stack.append(operand)
+    return len(seen)
+
+
+def knowledge_stats(name, build):
+    """
+    Reports the time and memory it takes to build a knowledge base, the
+    sentences it is made of, and the time to hash it, collect its
+    symbols and render its formula three times each.
+    """
+    tracemalloc.start()
+    start = time.perf_counter()
+    knowledge = build()
+    elapsed = time.perf_counter() - start
+    memory = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    print(f"{name}: built in {elapsed:.5f}s, {memory / 2 ** 20:.2f} MB, "
+          f"{distinct(knowledge)} distinct sentences")
+    for method in [hash, Sentence.symbols, Sentence.formula]:
+        start = time.perf_counter()
+        for _ in range(3):
+            method(knowledge)
+        elapsed = time.perf_counter() - start
+        print(f"  {method.__name__:<10}{elapsed:>12.5f}")
+    return knowledge
+
+
+def time_backend(backend, puzzles, queries, repeat):
+    """
+    Returns the entailed (puzzle, query) pairs found by a backend and
+    its best time over `repeat` runs of checking every query.
+    """
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        entailed = [(i, query) for i, knowledge in enumerate(puzzles)
+                    for query in queries
+                    if model_check(knowledge, query, backend)]
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return entailed, best
+
+
+def compare_backends(puzzles, queries, backends, repeat):
+    """
+    Reports the time each backend takes to solve the puzzles.
+    """
+    print(f"{'backend':<12}{'seconds':>12}")
+    results = []
+    for backend in backends:
+        entailed, elapsed = time_backend(backend, puzzles, queries, repeat)
+        results.append(entailed)
+        print(f"{backend:<12}{elapsed:>12.5f}")
+    if any(entailed != results[0] for entailed in results):
+        sys.exit("Backends disagree.")
+
+
+def compare_batch(puzzles, queries, repeat):
+    """
+    Reports the time to check every query against each puzzle one call
+    at a time and in one model_check_all call per puzzle.
+    """
+    single, elapsed = time_backend("compiled", puzzles, queries, repeat)
+    print(f"{'per query':<12}{elapsed:>12.5f}")
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        batch = [(i, query) for i, knowledge in enumerate(puzzles)
+                 for query, entailed in zip(
+                     queries, model_check_all(knowledge, queries)[0])
+                 if entailed]
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    print(f"{'batch':<12}{best:>12.5f}")
+    if batch != single:
+        sys.exit("Batch and single queries disagree.")
+
+
+def main():
+    if len(sys.argv) > 2:
+        sys.exit("Usage: python benchmark.py [repeat]")
+    repeat = int(sys.argv[1]) if len(sys.argv) == 2 else 5
+
+    print("Knights puzzles")
+    compare_backends(PUZZLES, SYMBOLS, ["enumerate", "compiled", "sat"],
+                     repeat)
+    for characters in [5, 8, 12, 50, 200]:
+        symbols, knowledge = scaled_puzzle(characters)
+        backends = [backend for backend, limit in SCALED_BACKENDS
+                    if len(symbols) <= limit]
+        print(f"{characters} characters, {len(symbols)} symbols")
+        compare_backends([knowledge], symbols, backends, 1)
+
+    print("Every query at once")
+    compare_batch(PUZZLES, SYMBOLS, repeat)
+    for characters in [5, 8, 12]:
+        symbols, knowledge = scaled_puzzle(characters)
+        print(f"{characters} characters, {len(symbols)} symbols")
+        compare_batch([knowledge], symbols, 1)
+
+    print("Knowledge bases")
+    knowledge_stats("3000 characters", lambda: scaled_puzzle(3000)[1])
+    knowledge_stats("exactly one of 300", lambda: exactly_one(
+        [Symbol(f"cell {i}") for i in range(300)]))
+
+
+if __name__ == "__main__":
+    main()
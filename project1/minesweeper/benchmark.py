@@ -0,0 +1,166 @@
+"""
+Benchmarks for the Minesweeper AI.
+
+Usage: python benchmark.py [games]
+"""
+
+import random
+import sys
+import time
+import tracemalloc
+
+from minesweeper import Minesweeper, MinesweeperAI, Sentence
+from simulate import PLAYERS, play
+
+# Board sizes as (name, height, width, mines)
+BOARDS = [
+    ("beginner", 8, 8, 10),
+    ("intermediate", 16, 16, 40),
+    ("expert", 16, 30, 99)
+]
+
+
+def play_games(player, games, height, width, mines, seed=0):
+    """
+    Plays `games` reproducible games and returns the number won, the
+    total number of moves, the total wall time and the largest knowledge
+    base of any game.
+    """
+    won = moves = peak = 0
+    start = time.perf_counter()
+    for game in range(games):
+        random.seed(seed + game)
+        result, count, size, _, _ = play(player, height, width, mines)
+        won += result
+        moves += count
+        peak = max(peak, size)
+    return won, moves, time.perf_counter() - start, peak
+
+
+def peak_memory(player, games, height, width, mines, seed=0):
+    """
+    Replays the games of play_games under tracemalloc and returns the
+    peak memory, in bytes, allocated during any one of them.
+    """
+    peak = 0
+    tracemalloc.start()
+    for game in range(games):
+        random.seed(seed + game)
+        tracemalloc.reset_peak()
+        start = tracemalloc.get_traced_memory()[0]
+        play(player, height, width, mines)
+        peak = max(peak, tracemalloc.get_traced_memory()[1] - start)
+    tracemalloc.stop()
+    return peak
+
+
+def random_sentences(count, height, width, seed=0):
+    """
+    Returns `count` reproducible sentences about random cells of a 3x3
+    window each, like those the AI learns from a revealed cell.
+    """
+    generator = random.Random(seed)
+    sentences = []
+    for _ in range(count):
+        i = generator.randrange(height)
+        j = generator.randrange(width)
+        cells = [(x, y) for x in range(max(0, i - 1), min(i + 2, height))
+                 for y in range(max(0, j - 1), min(j + 2, width))
+                 if (x, y) == (i, j) or generator.random() < 0.7]
+        sentences.append(Sentence(cells, generator.randint(0, len(cells)),
+                                  width))
+    return sentences
+
+
+def sentence_stats(count, height, width):
+    """
+    Reports the memory taken by `count` random sentences, and the time to
+    add them to a knowledge base and to look each of them up in it.
+    """
+    tracemalloc.start()
+    start = tracemalloc.get_traced_memory()[0]
+    sentences = random_sentences(count, height, width)
+    memory = tracemalloc.get_traced_memory()[0] - start
+    tracemalloc.stop()
+
+    ai = MinesweeperAI(height=height, width=width)
+    start = time.perf_counter()
+    for sentence in sentences:
+        ai.add_sentence(sentence)
+    added = time.perf_counter() - start
+    start = time.perf_counter()
+    found = sum(sentence in ai.knowledge
+                for sentence in random_sentences(count, height, width))
+    looked_up = time.perf_counter() - start
+    print(f"{'bytes per sentence':<24}{memory / count:>12.0f}")
+    print(f"{'sentences added/s':<24}{count / added:>12.0f}")
+    print(f"{'lookups/s':<24}{count / looked_up:>12.0f}")
+    if found != count:
+        sys.exit("Sentences went missing.")
+
+
+def board_stats(size, density=0.15, lookups=100000):
+    """
+    Reports the time to set up a size x size board, to look up the
+    nearby mines of random cells, and to reveal every safe cell by
+    clicking each cell not yet uncovered.
+    """
+    random.seed(0)
+    start = time.perf_counter()
+    game = Minesweeper(height=size, width=size,
+                       mines=int(size * size * density))
+    built = time.perf_counter() - start
+
+    cells = [(random.randrange(size), random.randrange(size))
+             for _ in range(lookups)]
+    start = time.perf_counter()
+    for cell in cells:
+        game.nearby_mines(cell)
+    looked_up = time.perf_counter() - start
+
+    start = time.perf_counter()
+    revealed = set()
+    clicks = 0
+    for i in range(size):
+        for j in range(size):
+            if (i, j) not in revealed and not game.is_mine((i, j)):
+                revealed.update(game.reveal((i, j)))
+                clicks += 1
+    cleared = time.perf_counter() - start
+    print(f"{size}x{size}: set up in {built:.3f}s, {lookups} lookups in "
+          f"{looked_up:.3f}s, cleared in {cleared:.2f}s with {clicks} clicks")
+
+
+def main():
+    if len(sys.argv) > 2:
+        sys.exit("Usage: python benchmark.py [games]")
+    games = int(sys.argv[1]) if len(sys.argv) == 2 else 1000
+
+    print(f"{'board':<14}{'player':<13}{'games':>7}{'won':>8}"
+          f"{'seconds':>10}{'moves/s':>10}")
+    for name, height, width, mines in BOARDS:
+        for player_name, player in PLAYERS.items():
+            won, moves, elapsed, _ = play_games(player, games,
+                                                height, width, mines)
+            print(f"{name:<14}{player_name:<13}{games:>7}"
+                  f"{won / games:>8.1%}{elapsed:>10.2f}"
+                  f"{moves / elapsed:>10.0f}")
+
+    name, height, width, mines = BOARDS[-1]
+    player_name, player = "random", PLAYERS["random"]
+    print(f"Knowledge base of the {player_name} player, {name} boards")
+    won, moves, elapsed, peak = play_games(player, games,
+                                           height, width, mines)
+    memory = peak_memory(player, min(games, 100), height, width, mines)
+    print(f"{'moves/s':<24}{moves / elapsed:>12.0f}")
+    print(f"{'peak sentences':<24}{peak:>12}")
+    print(f"{'peak KB per game':<24}{memory / 1024:>12.1f}")
+    sentence_stats(10000, height, width)
+
+    print("Boards")
+    for size in [100, 1000]:
+        board_stats(size)
+
+
+if __name__ == "__main__":
+    main()
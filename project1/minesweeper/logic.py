@@ -1,19 +1,90 @@
+import functools
 import itertools
+import weakref
 
 
 class Sentence():
+    """
+    Immutable, hash-consed logical sentence.
+
+    Sentences are built through their class constructors, which return
+    the one live instance of each distinct sentence, so structurally
+    equal sentences are the same object, and equality and hashing are by
+    identity. Each caches, once first asked for, its frozen set of
+    symbols and its formula.
+    """
+
+    __slots__ = ("_symbols", "_formula", "__weakref__")
+
+    # Every live sentence, keyed by its kind and operands
+    interned = weakref.WeakValueDictionary()
+
+    @classmethod
+    def intern(cls, key, *fields):
+        """
+        Returns the live sentence of this class with the given key,
+        creating it from its fields, in `__slots__` order, if there is none.
+        """
+        sentence = Sentence.interned.get(key)
+        if sentence is None:
+            sentence = object.__new__(cls)
+            for name, value in zip(cls.__slots__, fields):
+                object.__setattr__(sentence, name, value)
+            Sentence.interned[key] = sentence
+        return sentence
+
+    def __setattr__(self, name, value):
+        raise AttributeError("sentences are immutable")
+
+    def __reduce__(self):
+        return type(self), tuple(self.operands())
 
     def evaluate(self, model):
         """Evaluates the logical sentence."""
         raise Exception("nothing to evaluate")
 
+    def evaluate_partial(self, model):
+        """
+        Evaluates the logical sentence in a model that may leave symbols
+        unassigned, returning None if its value depends on them.
+        """
+        raise Exception("nothing to evaluate")
+
+    def operands(self):
+        """Returns the sentences the logical sentence is built from."""
+        return []
+
     def formula(self):
         """Returns string formula representing logical sentence."""
+        if not hasattr(self, "_formula"):
+            object.__setattr__(self, "_formula", self.render())
+        return self._formula
+
+    def render(self):
+        """Builds the string formula once, for `formula` to cache."""
         return ""
 
     def symbols(self):
-        """Returns a set of all symbols in the logical sentence."""
-        return set()
+        """Returns a frozen set of all symbols in the logical sentence."""
+        if not hasattr(self, "_symbols"):
+            object.__setattr__(self, "_symbols", frozenset().union(
+                *[operand.symbols() for operand in self.operands()]))
+        return self._symbols
+
+    def expression(self, program):
+        """
+        Returns a Python expression evaluating the sentence bitwise over
+        truth columns `c`, with `f` all ones, from the variables
+        `program` holds for its operands.
+        """
+        raise Exception("nothing to compile")
+
+    def tseitin(self, cnf):
+        """
+        Adds clauses defining the sentence to `cnf` and returns
+        the literal standing for it.
+        """
+        raise Exception("nothing to convert")
 
     @classmethod
     def validate(cls, sentence):
@@ -43,42 +114,48 @@ class Sentence():
 
 
 class Symbol(Sentence):
+    __slots__ = ("name",)
 
-    def __init__(self, name):
-        self.name = name
-
-    def __eq__(self, other):
-        return isinstance(other, Symbol) and self.name == other.name
-
-    def __hash__(self):
-        return hash(("symbol", self.name))
+    def __new__(cls, name):
+        return cls.intern(("symbol", name), name)
 
     def __repr__(self):
         return self.name
 
+    def __reduce__(self):
+        return Symbol, (self.name,)
+
     def evaluate(self, model):
         try:
             return bool(model[self.name])
         except KeyError:
             raise Exception(f"variable {self.name} not in model")
 
-    def formula(self):
-        return self.name
+    def evaluate_partial(self, model):
+        value = model.get(self.name)
+        return None if value is None else bool(value)
 
     def symbols(self):
-        return {self.name}
+        if not hasattr(self, "_symbols"):
+            object.__setattr__(self, "_symbols", frozenset([self.name]))
+        return self._symbols
 
+    def render(self):
+        return self.name
 
-class Not(Sentence):
-    def __init__(self, operand):
-        Sentence.validate(operand)
-        self.operand = operand
+    def expression(self, program):
+        return f"c[{program.index[self.name]}]"
 
-    def __eq__(self, other):
-        return isinstance(other, Not) and self.operand == other.operand
+    def tseitin(self, cnf):
+        return cnf.variable(self.name)
 
-    def __hash__(self):
-        return hash(("not", hash(self.operand)))
+
+class Not(Sentence):
+    __slots__ = ("operand",)
+
+    def __new__(cls, operand):
+        Sentence.validate(operand)
+        return cls.intern(("not", operand), operand)
 
     def __repr__(self):
         return f"Not({self.operand})"
@@ -86,26 +163,30 @@ class Not(Sentence):
     def evaluate(self, model):
         return not self.operand.evaluate(model)
 
-    def formula(self):
+    def evaluate_partial(self, model):
+        value = self.operand.evaluate_partial(model)
+        return None if value is None else not value
+
+    def operands(self):
+        return [self.operand]
+
+    def render(self):
         return "¬" + Sentence.parenthesize(self.operand.formula())
 
-    def symbols(self):
-        return self.operand.symbols()
+    def expression(self, program):
+        return f"f ^ {program.name(self.operand)}"
+
+    def tseitin(self, cnf):
+        return -cnf.literal(self.operand)
 
 
 class And(Sentence):
-    def __init__(self, *conjuncts):
+    __slots__ = ("conjuncts",)
+
+    def __new__(cls, *conjuncts):
         for conjunct in conjuncts:
             Sentence.validate(conjunct)
-        self.conjuncts = list(conjuncts)
-
-    def __eq__(self, other):
-        return isinstance(other, And) and self.conjuncts == other.conjuncts
-
-    def __hash__(self):
-        return hash(
-            ("and", tuple(hash(conjunct) for conjunct in self.conjuncts))
-        )
+        return cls.intern(("and", conjuncts), conjuncts)
 
     def __repr__(self):
         conjunctions = ", ".join(
@@ -114,35 +195,51 @@ class And(Sentence):
         return f"And({conjunctions})"
 
     def add(self, conjunct):
-        Sentence.validate(conjunct)
-        self.conjuncts.append(conjunct)
+        """
+        Sentences are immutable and shared, so a conjunction cannot be
+        extended in place; build a new one instead.
+        """
+        raise TypeError(
+            "And sentences are immutable; "
+            "use And(*knowledge.conjuncts, conjunct) instead of add")
 
     def evaluate(self, model):
         return all(conjunct.evaluate(model) for conjunct in self.conjuncts)
 
-    def formula(self):
+    def evaluate_partial(self, model):
+        result = True
+        for conjunct in self.conjuncts:
+            value = conjunct.evaluate_partial(model)
+            if value is False:
+                return False
+            if value is None:
+                result = None
+        return result
+
+    def operands(self):
+        return list(self.conjuncts)
+
+    def render(self):
         if len(self.conjuncts) == 1:
             return self.conjuncts[0].formula()
         return " ∧ ".join([Sentence.parenthesize(conjunct.formula())
                            for conjunct in self.conjuncts])
 
-    def symbols(self):
-        return set.union(*[conjunct.symbols() for conjunct in self.conjuncts])
+    def expression(self, program):
+        return program.join("&", self.conjuncts, "f")
+
+    def tseitin(self, cnf):
+        return cnf.conjunction([cnf.literal(conjunct)
+                                for conjunct in self.conjuncts])
 
 
 class Or(Sentence):
-    def __init__(self, *disjuncts):
+    __slots__ = ("disjuncts",)
+
+    def __new__(cls, *disjuncts):
         for disjunct in disjuncts:
             Sentence.validate(disjunct)
-        self.disjuncts = list(disjuncts)
-
-    def __eq__(self, other):
-        return isinstance(other, Or) and self.disjuncts == other.disjuncts
-
-    def __hash__(self):
-        return hash(
-            ("or", tuple(hash(disjunct) for disjunct in self.disjuncts))
-        )
+        return cls.intern(("or", disjuncts), disjuncts)
 
     def __repr__(self):
         disjuncts = ", ".join([str(disjunct) for disjunct in self.disjuncts])
@@ -151,30 +248,41 @@ class Or(Sentence):
     def evaluate(self, model):
         return any(disjunct.evaluate(model) for disjunct in self.disjuncts)
 
-    def formula(self):
+    def evaluate_partial(self, model):
+        result = False
+        for disjunct in self.disjuncts:
+            value = disjunct.evaluate_partial(model)
+            if value is True:
+                return True
+            if value is None:
+                result = None
+        return result
+
+    def operands(self):
+        return list(self.disjuncts)
+
+    def render(self):
         if len(self.disjuncts) == 1:
             return self.disjuncts[0].formula()
         return " ∨  ".join([Sentence.parenthesize(disjunct.formula())
                             for disjunct in self.disjuncts])
 
-    def symbols(self):
-        return set.union(*[disjunct.symbols() for disjunct in self.disjuncts])
+    def expression(self, program):
+        return program.join("|", self.disjuncts, "0")
+
+    def tseitin(self, cnf):
+        return -cnf.conjunction([-cnf.literal(disjunct)
+                                 for disjunct in self.disjuncts])
 
 
 class Implication(Sentence):
-    def __init__(self, antecedent, consequent):
+    __slots__ = ("antecedent", "consequent")
+
+    def __new__(cls, antecedent, consequent):
         Sentence.validate(antecedent)
         Sentence.validate(consequent)
-        self.antecedent = antecedent
-        self.consequent = consequent
-
-    def __eq__(self, other):
-        return (isinstance(other, Implication)
-                and self.antecedent == other.antecedent
-                and self.consequent == other.consequent)
-
-    def __hash__(self):
-        return hash(("implies", hash(self.antecedent), hash(self.consequent)))
+        return cls.intern(("implies", antecedent, consequent),
+                          antecedent, consequent)
 
     def __repr__(self):
         return f"Implication({self.antecedent}, {self.consequent})"
@@ -183,29 +291,42 @@ class Implication(Sentence):
         return ((not self.antecedent.evaluate(model))
                 or self.consequent.evaluate(model))
 
-    def formula(self):
+    def evaluate_partial(self, model):
+        antecedent = self.antecedent.evaluate_partial(model)
+        if antecedent is False:
+            return True
+        consequent = self.consequent.evaluate_partial(model)
+        if consequent is True:
+            return True
+        if antecedent is None or consequent is None:
+            return None
+        return False
+
+    def operands(self):
+        return [self.antecedent, self.consequent]
+
+    def render(self):
         antecedent = Sentence.parenthesize(self.antecedent.formula())
         consequent = Sentence.parenthesize(self.consequent.formula())
         return f"{antecedent} => {consequent}"
 
-    def symbols(self):
-        return set.union(self.antecedent.symbols(), self.consequent.symbols())
+    def expression(self, program):
+        antecedent = program.name(self.antecedent)
+        consequent = program.name(self.consequent)
+        return f"(f ^ {antecedent}) | {consequent}"
+
+    def tseitin(self, cnf):
+        return -cnf.conjunction([cnf.literal(self.antecedent),
+                                 -cnf.literal(self.consequent)])
 
 
 class Biconditional(Sentence):
-    def __init__(self, left, right):
+    __slots__ = ("left", "right")
+
+    def __new__(cls, left, right):
         Sentence.validate(left)
         Sentence.validate(right)
-        self.left = left
-        self.right = right
-
-    def __eq__(self, other):
-        return (isinstance(other, Biconditional)
-                and self.left == other.left
-                and self.right == other.right)
-
-    def __hash__(self):
-        return hash(("biconditional", hash(self.left), hash(self.right)))
+        return cls.intern(("biconditional", left, right), left, right)
 
     def __repr__(self):
         return f"Biconditional({self.left}, {self.right})"
@@ -216,21 +337,73 @@ class Biconditional(Sentence):
                 or (not self.left.evaluate(model)
                     and not self.right.evaluate(model)))
 
-    def formula(self):
+    def evaluate_partial(self, model):
+        left = self.left.evaluate_partial(model)
+        if left is None:
+            return None
+        right = self.right.evaluate_partial(model)
+        if right is None:
+            return None
+        return left == right
+
+    def operands(self):
+        return [self.left, self.right]
+
+    def render(self):
         left = Sentence.parenthesize(str(self.left))
         right = Sentence.parenthesize(str(self.right))
         return f"{left} <=> {right}"
 
-    def symbols(self):
-        return set.union(self.left.symbols(), self.right.symbols())
-
-
-def model_check(knowledge, query):
-    """Checks if knowledge base entails query."""
+    def expression(self, program):
+        left = program.name(self.left)
+        right = program.name(self.right)
+        return f"f ^ {left} ^ {right}"
+
+    def tseitin(self, cnf):
+        left = cnf.literal(self.left)
+        right = cnf.literal(self.right)
+        literal = cnf.new_variable()
+        cnf.clauses.extend([
+            [-literal, -left, right],
+            [-literal, left, -right],
+            [literal, left, right],
+            [literal, -left, -right]
+        ])
+        return literal
+
+
+def model_check(knowledge, query, backend="enumerate"):
+    """
+    Checks if knowledge base entails query.
+
+    `backend` picks how models are checked: "enumerate" assigns symbols
+    one at a time, most frequent first, and prunes every partial model
+    that already decides the entailment, "compiled" checks them
+    bit-parallel with compiled sentences (see `compiled_model_check`)
+    and "sat" searches for a counter-model with a SAT solver
+    (see `sat_model_check`).
+    """
+    if backend == "compiled":
+        return compiled_model_check(knowledge, query)
+    if backend == "sat":
+        return sat_model_check(knowledge, query)
+    if backend != "enumerate":
+        raise ValueError(f"unknown backend {backend}")
 
     def check_all(knowledge, query, symbols, model):
         """Checks if knowledge base entails query, given a particular model."""
 
+        # If the partial model already decides the knowledge base or the
+        # query, every way of completing it gives the same answer
+        known = knowledge.evaluate_partial(model)
+        if known is False:
+            return True
+        result = query.evaluate_partial(model)
+        if result is True:
+            return True
+        if known is True and result is False:
+            return False
+
         # If model has an assignment for each symbol
         if not symbols:
 
@@ -240,7 +413,7 @@ def model_check(knowledge, query):
             return True
         else:
 
-            # Choose one of the remaining unused symbols
+            # Choose the most frequent of the remaining unused symbols
             remaining = symbols.copy()
             p = remaining.pop()
 
@@ -256,8 +429,330 @@ def model_check(knowledge, query):
             return (check_all(knowledge, query, remaining, model_true) and
                     check_all(knowledge, query, remaining, model_false))
 
-    # Get all symbols in both knowledge and query
-    symbols = set.union(knowledge.symbols(), query.symbols())
+    # Get all symbols in both knowledge and query, least frequent first
+    counts = symbol_counts(knowledge)
+    for symbol, count in symbol_counts(query).items():
+        counts[symbol] = counts.get(symbol, 0) + count
+    symbols = sorted(counts, key=lambda symbol: (counts[symbol], symbol))
 
     # Check that knowledge entails query
     return check_all(knowledge, query, symbols, dict())
+
+
+def symbol_counts(sentence):
+    """Returns how many times each symbol occurs in a sentence."""
+    counts = {}
+    stack = [sentence]
+    while stack:
+        sentence = stack.pop()
+        if isinstance(sentence, Symbol):
+            counts[sentence.name] = counts.get(sentence.name, 0) + 1
+        stack.extend(sentence.operands())
+    return counts
+
+
+# Number of symbols whose models are checked together, as the bits of
+# one integer of 2 ** CHUNK_SYMBOLS bits per symbol
+CHUNK_SYMBOLS = 16
+
+
+# Most operands joined in one line of compiled code
+JOIN_OPERANDS = 64
+
+
+class Program():
+    """
+    Python source computing a sentence bitwise, one line per distinct
+    subsentence, so that no line nests deeper than its own operator
+    however deep the sentence is.
+    """
+
+    def __init__(self, index):
+        self.index = index
+        self.lines = []
+        self.names = {}
+
+    def assign(self, expression):
+        """Returns a new variable set to the value of an expression."""
+        name = f"t{len(self.lines)}"
+        self.lines.append(f"    {name} = {expression}")
+        return name
+
+    def name(self, sentence):
+        """
+        Returns the variable holding the truth column of a sentence,
+        compiling each distinct subsentence only once.
+        """
+        if sentence not in self.names:
+            self.names[sentence] = self.assign(sentence.expression(self))
+        return self.names[sentence]
+
+    def join(self, operator, operands, empty):
+        """
+        Returns an expression joining the operands with a bitwise
+        operator, or `empty` if there are none, combining them in groups
+        of at most JOIN_OPERANDS first if there are too many for a line.
+        """
+        names = list(dict.fromkeys(self.name(operand)
+                                   for operand in operands))
+        if not names:
+            return empty
+        while len(names) > JOIN_OPERANDS:
+            names = [
+                self.assign(f" {operator} ".join(
+                    names[i:i + JOIN_OPERANDS]))
+                for i in range(0, len(names), JOIN_OPERANDS)
+            ]
+        return f" {operator} ".join(names)
+
+
+@functools.lru_cache(maxsize=256)
+def compile_sentence(sentence, symbols):
+    """
+    Compiles a sentence over a tuple of symbols into a function of
+    (columns, full), caching recently compiled sentences.
+
+    Bit m of `columns[i]` is the value of `symbols[i]` in the m-th model
+    of a chunk, and `full` has a bit set for every model of the chunk;
+    the function returns the bits of the models where the sentence is
+    true. With single-bit columns and `full` 1, it evaluates one model
+    given as a bitmask.
+    """
+    program = Program({symbol: i for i, symbol in enumerate(symbols)})
+    result = program.name(sentence)
+    namespace = {}
+    exec("\n".join(["def compiled(c, f):", *program.lines,
+                    f"    return {result}"]), namespace)
+    return namespace["compiled"]
+
+
+def truth_columns(count, full):
+    """
+    Returns the truth columns of the first `count` symbols over all
+    2 ** count models, each column a `full`-wide integer.
+    """
+    columns = []
+    for i in range(count):
+        width = 1 << (i + 1)
+        column = ((1 << (1 << i)) - 1) << (1 << i)
+        while width < 1 << count:
+            column |= column << width
+            width <<= 1
+        columns.append(column & full)
+    return columns
+
+
+def chunks(count):
+    """
+    Yields (columns, full) for every chunk of the models of `count`
+    symbols: the first CHUNK_SYMBOLS symbols vary within a chunk, and
+    the others are constant, all zeros or all ones, across it.
+    """
+    low = min(count, CHUNK_SYMBOLS)
+    full = (1 << (1 << low)) - 1
+    low_columns = truth_columns(low, full)
+    for high in range(1 << (count - low)):
+        yield low_columns + [full if high >> i & 1 else 0
+                             for i in range(count - low)], full
+
+
+def compiled_model_check(knowledge, query):
+    """
+    Checks if knowledge base entails query by compiling both once and
+    evaluating them over chunks of models at a time, each model a bit.
+    """
+    symbols = tuple(sorted(knowledge.symbols() | query.symbols()))
+    knowledge = compile_sentence(knowledge, symbols)
+    query = compile_sentence(query, symbols)
+    for columns, full in chunks(len(symbols)):
+        if knowledge(columns, full) & ~query(columns, full) & full:
+            return False
+    return True
+
+
+def model_check_all(knowledge, queries):
+    """
+    Checks which of the queries the knowledge base entails, enumerating
+    the models once for all of them.
+
+    Returns the list of results, in query order, and the models of the
+    knowledge base as a bitset: bit m is set if the knowledge base is true
+    in the m-th model, which gives the i-th of the sorted symbols of the
+    knowledge base and queries the value of bit i of m.
+    """
+    symbols = set(knowledge.symbols())
+    for query in queries:
+        symbols |= query.symbols()
+    symbols = tuple(sorted(symbols))
+    knowledge = compile_sentence(knowledge, symbols)
+    compiled = [compile_sentence(query, symbols) for query in queries]
+
+    # Models of each chunk, as little-endian bytes to join at the end
+    results = [True] * len(compiled)
+    parts = []
+    for columns, full in chunks(len(symbols)):
+        satisfying = knowledge(columns, full) & full
+        parts.append(satisfying.to_bytes((full.bit_length() + 7) // 8,
+                                         "little"))
+        if not satisfying:
+            continue
+        for i, query in enumerate(compiled):
+            if results[i] and satisfying & ~query(columns, full):
+                results[i] = False
+    return results, int.from_bytes(b"".join(parts), "little")
+
+
+class CNF():
+    """
+    Conjunctive normal form built by the Tseitin transformation.
+
+    Symbols and subsentences are numbered from 1; a literal is a variable
+    number, negated for its negation, and a clause is a list of literals.
+    """
+
+    def __init__(self):
+        self.variables = {}
+        self.literals = {}
+        self.count = 0
+        self.clauses = []
+
+    def new_variable(self):
+        self.count += 1
+        return self.count
+
+    def variable(self, name):
+        """Returns the variable of a symbol."""
+        if name not in self.variables:
+            self.variables[name] = self.new_variable()
+        return self.variables[name]
+
+    def literal(self, sentence):
+        """
+        Returns the literal standing for a sentence, converting each
+        distinct subsentence only once.
+        """
+        if sentence not in self.literals:
+            self.literals[sentence] = sentence.tseitin(self)
+        return self.literals[sentence]
+
+    def conjunction(self, literals):
+        """Returns a new variable defined as the conjunction of literals."""
+        literal = self.new_variable()
+        for conjunct in literals:
+            self.clauses.append([-literal, conjunct])
+        self.clauses.append([literal] + [-conjunct for conjunct in literals])
+        return literal
+
+    def add(self, sentence):
+        """Adds clauses asserting that the sentence is true."""
+        if isinstance(sentence, And):
+            for conjunct in sentence.conjuncts:
+                self.add(conjunct)
+        else:
+            self.clauses.append([self.literal(sentence)])
+
+
+def satisfiable(clauses, count):
+    """
+    Decides whether clauses over variables 1..count can all be satisfied,
+    by DPLL search with unit propagation over two watched literals.
+
+    Returns a satisfying assignment as a list indexed by variable, with
+    1 for true and -1 for false (entry 0 unused), or None.
+    """
+    values = [0] * (count + 1)
+    trail = []
+    watches = [[] for _ in range(2 * count + 1)]
+    occurrences = [0] * (count + 1)
+
+    def assign(literal):
+        values[abs(literal)] = 1 if literal > 0 else -1
+        trail.append(literal)
+
+    def value(literal):
+        return values[literal] if literal > 0 else -values[-literal]
+
+    # Watch the first two literals of every clause, and assign units
+    for clause in clauses:
+        clause = list(dict.fromkeys(clause))
+        if any(-literal in clause for literal in clause):
+            continue
+        for literal in clause:
+            occurrences[abs(literal)] += 1
+        if not clause:
+            return None
+        if len(clause) == 1:
+            if value(clause[0]) == -1:
+                return None
+            if value(clause[0]) == 0:
+                assign(clause[0])
+            continue
+        watches[clause[0]].append(clause)
+        watches[clause[1]].append(clause)
+
+    # Branch on the variables occurring most often first
+    order = sorted(range(1, count + 1), key=lambda v: -occurrences[v])
+
+    def propagate():
+        """Assigns implied literals, returning False on a conflict."""
+        nonlocal head
+        while head < len(trail):
+            false = -trail[head]
+            head += 1
+            watching = watches[false]
+            i = 0
+            while i < len(watching):
+                clause = watching[i]
+                if clause[0] == false:
+                    clause[0], clause[1] = clause[1], clause[0]
+                if value(clause[0]) == 1:
+                    i += 1
+                    continue
+                for k in range(2, len(clause)):
+                    if value(clause[k]) != -1:
+                        clause[1], clause[k] = clause[k], clause[1]
+                        watches[clause[1]].append(clause)
+                        watching[i] = watching[-1]
+                        watching.pop()
+                        break
+                else:
+                    if value(clause[0]) == -1:
+                        return False
+                    assign(clause[0])
+                    i += 1
+        return True
+
+    # Decisions as (trail length before, literal, whether already flipped)
+    decisions = []
+    head = 0
+    while True:
+        if not propagate():
+            while decisions:
+                size, literal, flipped = decisions.pop()
+                for assigned in trail[size:]:
+                    values[abs(assigned)] = 0
+                del trail[size:]
+                head = size
+                if not flipped:
+                    decisions.append((size, -literal, True))
+                    assign(-literal)
+                    break
+            else:
+                return None
+            continue
+        variable = next((v for v in order if not values[v]), None)
+        if variable is None:
+            return values
+        decisions.append((len(trail), -variable, False))
+        assign(-variable)
+
+
+def sat_model_check(knowledge, query):
+    """
+    Checks if knowledge base entails query by converting
+    knowledge ∧ ¬query to CNF and showing it is unsatisfiable.
+    """
+    cnf = CNF()
+    cnf.add(knowledge)
+    cnf.add(Not(query))
+    return satisfiable(cnf.clauses, cnf.count) is None
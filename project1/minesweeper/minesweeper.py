@@ -1,10 +1,16 @@
 import itertools
 import random
+from array import array
+from collections import deque
 
 
 class Minesweeper():
     """
     Minesweeper game representation
+
+    Cell (i, j) is entry i * width + j of flat byte arrays: `grid` holds
+    1 for a mine and `counts` the number of mines around each cell,
+    computed once when the mines are placed.
     """
 
     def __init__(self, height=8, width=8, mines=8):
@@ -12,27 +18,43 @@ class Minesweeper():
         # Set initial width, height, and number of mines
         self.height = height
         self.width = width
-        self.mines = set()
-
-        # Initialize an empty field with no mines
-        self.board = []
-        for i in range(self.height):
-            row = []
-            for j in range(self.width):
-                row.append(False)
-            self.board.append(row)
 
-        # Add mines randomly
-        while len(self.mines) != mines:
-            i = random.randrange(height)
-            j = random.randrange(width)
-            if not self.board[i][j]:
-                self.mines.add((i, j))
-                self.board[i][j] = True
+        # Add mines randomly, sampling cells without replacement
+        self.grid = bytearray(height * width)
+        self.mines = set()
+        for index in random.sample(range(height * width), mines):
+            self.grid[index] = 1
+            self.mines.add(divmod(index, width))
+        self.counts = self.neighbor_counts()
 
         # At first, player has found no mines
         self.mines_found = set()
 
+    def neighbor_counts(self):
+        """
+        Returns the number of mines around every cell, as a flat byte
+        array like `grid`.
+
+        Each row is read as one big integer with a byte per cell, so
+        adding it to itself shifted by a byte either way sums every
+        cell with its left and right neighbors at once. Counts never
+        exceed 9, so no sum carries into the next cell's byte.
+        """
+        width = self.width
+        full = (1 << 8 * width) - 1
+        rows = [int.from_bytes(self.grid[i * width:(i + 1) * width], "big")
+                for i in range(self.height)]
+        triples = [(row + (row << 8) + (row >> 8)) & full for row in rows]
+        counts = bytearray()
+        for i, row in enumerate(rows):
+            total = triples[i] - row
+            if i > 0:
+                total += triples[i - 1]
+            if i + 1 < self.height:
+                total += triples[i + 1]
+            counts += total.to_bytes(width, "big")
+        return counts
+
     def print(self):
         """
         Prints a text-based representation
@@ -41,7 +63,7 @@ class Minesweeper():
         for i in range(self.height):
             print("--" * self.width + "-")
             for j in range(self.width):
-                if self.board[i][j]:
+                if self.grid[i * self.width + j]:
                     print("|X", end="")
                 else:
                     print("| ", end="")
@@ -50,7 +72,7 @@ class Minesweeper():
 
     def is_mine(self, cell):
         i, j = cell
-        return self.board[i][j]
+        return self.grid[i * self.width + j] == 1
 
     def nearby_mines(self, cell):
         """
@@ -58,24 +80,33 @@ class Minesweeper():
         within one row and column of a given cell,
         not including the cell itself.
         """
+        i, j = cell
+        return self.counts[i * self.width + j]
 
-        # Keep count of nearby mines
-        count = 0
-
-        # Loop over all cells within one row and column
-        for i in range(cell[0] - 1, cell[0] + 2):
-            for j in range(cell[1] - 1, cell[1] + 2):
-
-                # Ignore the cell itself
-                if (i, j) == cell:
-                    continue
-
-                # Update count if cell in bounds and is mine
-                if 0 <= i < self.height and 0 <= j < self.width:
-                    if self.board[i][j]:
-                        count += 1
-
-        return count
+    def reveal(self, cell):
+        """
+        Returns a dict mapping the cells uncovered by clicking a safe cell
+        to their number of nearby mines: the cell itself and, if it has
+        no nearby mines, every cell reached by flood-filling through
+        cells that have none either, together with their neighbors.
+        """
+        width = self.width
+        counts = self.counts
+        start = cell[0] * width + cell[1]
+        seen = {start}
+        queue = deque([start])
+        while queue:
+            index = queue.popleft()
+            if counts[index]:
+                continue
+            i, j = divmod(index, width)
+            for x in range(max(0, i - 1), min(i + 2, self.height)):
+                for y in range(max(0, j - 1), min(j + 2, width)):
+                    neighbor = x * width + y
+                    if neighbor not in seen:
+                        seen.add(neighbor)
+                        queue.append(neighbor)
+        return {divmod(index, width): counts[index] for index in seen}
 
     def won(self):
         """
@@ -84,19 +115,107 @@ class Minesweeper():
         return self.mines_found == self.mines
 
 
+def mask_bits(mask):
+    """
+    Yields the positions of the bits set in a mask.
+    """
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
+
+
 class Sentence():
     """
     Logical statement about a Minesweeper game
     A sentence consists of a set of board cells,
     and a count of the number of those cells which are mines.
+
+    Cell (i, j) is numbered i * width + j. The cells are kept as an
+    integer mask shifted down so that bit 0 is the lowest-numbered cell,
+    whose number is `offset`, so masks stay the size of the sentence
+    wherever it is on the board. Sentences of the same width compare by
+    offset, mask and count, others by their cells. Sentences in a set or
+    dict must not be marked.
     """
 
-    def __init__(self, cells, count):
-        self.cells = set(cells)
+    __slots__ = ("mask", "offset", "count", "width")
+
+    def __init__(self, cells, count, width=None):
+        cells = list(cells)
+        if width is None:
+            width = max((j + 1 for i, j in cells), default=1)
+        mask = 0
+        for i, j in cells:
+            mask |= 1 << i * width + j
+        self.width = width
         self.count = count
+        self.set_mask(mask, 0)
+
+    @classmethod
+    def from_mask(cls, mask, count, width, offset=0):
+        """
+        Returns the sentence about the cells of a mask whose bit 0 is
+        cell number `offset`.
+        """
+        sentence = cls.__new__(cls)
+        sentence.width = width
+        sentence.count = count
+        sentence.set_mask(mask, offset)
+        return sentence
+
+    def set_mask(self, mask, offset):
+        """
+        Sets the cells to those of a mask whose bit 0 is cell number
+        `offset`, shifting it down to its lowest cell.
+        """
+        if mask:
+            low = (mask & -mask).bit_length() - 1
+            mask >>= low
+            offset += low
+        else:
+            offset = 0
+        self.mask = mask
+        self.offset = offset
+
+    def bits(self):
+        """
+        Yields the numbers of the cells of the sentence, in order.
+        """
+        offset = self.offset
+        for bit in mask_bits(self.mask):
+            yield offset + bit
+
+    @property
+    def cells(self):
+        """
+        Returns a new set of the cells of the sentence: changing it does
+        not change the sentence, which only mark_mine and mark_safe do.
+        """
+        return {divmod(bit, self.width) for bit in self.bits()}
+
+    def bit(self, cell):
+        """
+        Returns the mask bit of a cell, or 0 if it is not in the mask.
+        """
+        i, j = cell
+        position = i * self.width + j - self.offset
+        if position < 0 or not 0 <= j < self.width:
+            return 0
+        return 1 << position
 
     def __eq__(self, other):
-        return self.cells == other.cells and self.count == other.count
+        if self.count != other.count:
+            return False
+        if self.width == other.width:
+            return self.mask == other.mask and self.offset == other.offset
+        return self.cells == other.cells
+
+    def __hash__(self):
+        # Cells come in the same order, row by row, whatever the width,
+        # so the first cell does not depend on it either
+        first = divmod(self.offset, self.width) if self.mask else None
+        return hash((first, self.mask.bit_count(), self.count))
 
     def __str__(self):
         return f"{self.cells} = {self.count}"
@@ -105,7 +224,7 @@ class Sentence():
         """
         Returns the set of all cells in self.cells known to be mines.
         """
-        if len(self.cells) == self.count:
+        if self.mask.bit_count() == self.count:
             return self.cells
         return set()
 
@@ -122,9 +241,10 @@ class Sentence():
         Updates internal knowledge representation given the fact that
         a cell is known to be a mine.
         """
-        if cell not in self.cells:
+        bit = self.bit(cell)
+        if not self.mask & bit:
             return
-        self.cells.remove(cell)
+        self.set_mask(self.mask ^ bit, self.offset)
         self.count -= 1
 
     def mark_safe(self, cell):
@@ -132,9 +252,10 @@ class Sentence():
         Updates internal knowledge representation given the fact that
         a cell is known to be safe.
         """
-        if cell not in self.cells:
+        bit = self.bit(cell)
+        if not self.mask & bit:
             return
-        self.cells.remove(cell)
+        self.set_mask(self.mask ^ bit, self.offset)
 
 
 class MinesweeperAI():
@@ -155,8 +276,25 @@ class MinesweeperAI():
         self.mines = set()
         self.safes = set()
 
-        # List of sentences about the game known to be true
-        self.knowledge = []
+        # Set of sentences about the game known to be true
+        self.knowledge = set()
+
+        # Sentences of the knowledge base containing each cell, by the
+        # cell's bit position i * width + j and then by id
+        self.containing = {}
+
+        # Sentences to re-examine, because they are new or have changed
+        self.pending = deque()
+
+        # Safe cells in the order they were found, some possibly played
+        # since, and how many safe cells have been queued
+        self.safe_queue = deque()
+        self.safes_queued = 0
+
+        # Cells neither played nor known to be mines, as i * width + j,
+        # and the position of each cell in `unknown` or -1 once removed
+        self.unknown = array("i", range(height * width))
+        self.positions = array("i", range(height * width))
 
     def mark_mine(self, cell):
         """
@@ -164,17 +302,63 @@ class MinesweeperAI():
         to mark that cell as a mine as well.
         """
         self.mines.add(cell)
-        for sentence in self.knowledge:
-            sentence.mark_mine(cell)
+        self.remove_unknown(cell)
+        self.mark(cell, Sentence.mark_mine)
 
     def mark_safe(self, cell):
         """
         Marks a cell as safe, and updates all knowledge
         to mark that cell as safe as well.
         """
-        self.safes.add(cell)
-        for sentence in self.knowledge:
-            sentence.mark_safe(cell)
+        if cell not in self.safes:
+            self.safes.add(cell)
+            self.safe_queue.append(cell)
+            self.safes_queued += 1
+        self.mark(cell, Sentence.mark_safe)
+
+    def remove_unknown(self, cell):
+        """
+        Removes a cell from the unknown cells, if it is still there,
+        by moving the last unknown cell into its place.
+        """
+        index = cell[0] * self.width + cell[1]
+        position = self.positions[index]
+        if position < 0:
+            return
+        last = self.unknown.pop()
+        if last != index:
+            self.unknown[position] = last
+            self.positions[last] = position
+        self.positions[index] = -1
+
+    def mark(self, cell, update):
+        """
+        Applies `update` for a cell to every sentence containing it,
+        taking each out of the knowledge base while its hash changes.
+        Sentences left empty or equal to another are dropped.
+        """
+        bit = cell[0] * self.width + cell[1]
+        for sentence in self.containing.pop(bit, {}).values():
+            self.knowledge.discard(sentence)
+            update(sentence, cell)
+            if sentence.mask and sentence not in self.knowledge:
+                self.knowledge.add(sentence)
+                self.pending.append(sentence)
+            else:
+                for bit in sentence.bits():
+                    del self.containing[bit][id(sentence)]
+
+    def add_sentence(self, sentence):
+        """
+        Adds a sentence to the knowledge base and queues it for inference,
+        unless it is empty or already known.
+        """
+        if not sentence.mask or sentence in self.knowledge:
+            return
+        self.knowledge.add(sentence)
+        for bit in sentence.bits():
+            self.containing.setdefault(bit, {})[id(sentence)] = sentence
+        self.pending.append(sentence)
 
     def add_knowledge(self, cell, count):
         """
@@ -192,6 +376,7 @@ class MinesweeperAI():
                if they can be inferred from existing knowledge
         """
         self.moves_made.add(cell)
+        self.remove_unknown(cell)
         self.mark_safe(cell)
         i, j = cell
         neighbors = set()
@@ -205,40 +390,53 @@ class MinesweeperAI():
                 if (x, y) in self.safes:
                     continue
                 neighbors.add((x, y))
-        sentence = Sentence(neighbors, count)
-        self.knowledge.append(sentence)
+        self.add_sentence(Sentence(neighbors, count, self.width))
         self.infer()
 
     def infer(self):
         """
-        Infers new sentences from existing knowledge
-        """
-        for sentence in self.knowledge:
-            mines = sentence.known_mines()
-            if len(mines) > 0:
-                self.knowledge.remove(sentence)
-                for mine in mines:
-                    self.mark_mine(mine)
-                self.infer()
-                return
-            safes = sentence.known_safes()
-            if len(safes) > 0:
-                self.knowledge.remove(sentence)
-                for safe in safes:
-                    self.mark_safe(safe)
-                self.infer()
-                return
-        for sentence1 in self.knowledge:
-            for sentence2 in self.knowledge:
-                if sentence1 == sentence2:
-                    continue
-                if sentence1.cells.issubset(sentence2.cells):
-                    new_sentence = Sentence(
-                        sentence2.cells - sentence1.cells, sentence2.count - sentence1.count)
-                    if new_sentence not in self.knowledge:
-                        self.knowledge.append(new_sentence)
-                        self.infer()
-                        return
+        Infers new knowledge from the pending sentences until none is left.
+
+        A sentence whose cells are all mines or all safe marks them, which
+        queues every other sentence containing them. Otherwise it is only
+        compared with the sentences it shares a cell with, since no other
+        sentence can be a subset or superset of it.
+        """
+        while self.pending:
+            sentence = self.pending.popleft()
+            offset = sentence.offset
+
+            # Skip sentences dropped from the knowledge base since
+            if not sentence.mask or id(sentence) not in self.containing.get(
+                    offset, {}):
+                continue
+            bits = list(sentence.bits())
+            if len(bits) == sentence.count:
+                for bit in bits:
+                    self.mark_mine(divmod(bit, self.width))
+                continue
+            if sentence.count == 0:
+                for bit in bits:
+                    self.mark_safe(divmod(bit, self.width))
+                continue
+            others = {}
+            for bit in bits:
+                others.update(self.containing[bit])
+            del others[id(sentence)]
+            for other in others.values():
+
+                # Line both masks up on the lower of their offsets
+                base = min(offset, other.offset)
+                mask = sentence.mask << offset - base
+                other_mask = other.mask << other.offset - base
+                if not mask & ~other_mask:
+                    self.add_sentence(Sentence.from_mask(
+                        other_mask & ~mask, other.count - sentence.count,
+                        self.width, base))
+                elif not other_mask & ~mask:
+                    self.add_sentence(Sentence.from_mask(
+                        mask & ~other_mask, sentence.count - other.count,
+                        self.width, base))
 
     def make_safe_move(self):
         """
@@ -249,10 +447,16 @@ class MinesweeperAI():
         This function may use the knowledge in self.mines, self.safes
         and self.moves_made, but should not modify any of those values.
         """
-        for cell in self.safes:
-            if cell not in self.moves_made:
-                return cell
-        return None
+
+        # Queue again any safe cells added to self.safes directly
+        if len(self.safes) != self.safes_queued:
+            self.safe_queue = deque(self.safes - self.moves_made)
+            self.safes_queued = len(self.safes)
+
+        queue = self.safe_queue
+        while queue and queue[0] in self.moves_made:
+            queue.popleft()
+        return queue[0] if queue else None
 
     def make_random_move(self):
         """
@@ -261,9 +465,14 @@ class MinesweeperAI():
             1) have not already been chosen, and
             2) are not known to be mines
         """
-        for i in range(self.height):
-            for j in range(self.width):
-                cell = (i, j)
-                if cell not in self.moves_made and cell not in self.mines:
-                    return cell
+
+        # Drop any cells played or marked as mines behind the AI's back
+        # as they come up
+        while self.unknown:
+            cell = divmod(
+                self.unknown[random.randrange(len(self.unknown))],
+                self.width)
+            if cell not in self.moves_made and cell not in self.mines:
+                return cell
+            self.remove_unknown(cell)
         return None
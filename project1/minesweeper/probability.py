@@ -0,0 +1,273 @@
+"""
+Probabilistic guessing for the Minesweeper AI.
+
+When no cell is known to be safe, ProbabilisticAI guesses the cell least
+likely to be a mine. The cells its sentences mention split into
+components that share no sentence; the mine configurations of each
+component that satisfy all its sentences are counted by backtracking,
+and weighted by the number of ways to place the remaining mines among
+the cells no sentence mentions.
+"""
+
+import functools
+import math
+
+from minesweeper import MinesweeperAI, mask_bits
+
+# Search nodes a component may take before its probabilities are only
+# estimated from its sentences
+BUDGET = 100000
+
+
+class BudgetExceeded(Exception):
+    """
+    Raised when counting the configurations of a component takes more
+    search nodes than its budget.
+    """
+
+
+def components(sentences):
+    """
+    Returns the sentences grouped into components, as lists of sentences
+    linked by shared cells, smallest first.
+    """
+    parent = {}
+
+    def find(bit):
+        while parent[bit] != bit:
+            parent[bit] = parent[parent[bit]]
+            bit = parent[bit]
+        return bit
+
+    for sentence in sentences:
+        bits = list(sentence.bits())
+        for bit in bits:
+            parent.setdefault(bit, bit)
+        root = find(bits[0])
+        for bit in bits[1:]:
+            other = find(bit)
+            if other != root:
+                parent[other] = root
+
+    groups = {}
+    for sentence in sentences:
+        groups.setdefault(find(sentence.offset), []).append(sentence)
+    return sorted(groups.values(), key=len)
+
+
+@functools.lru_cache(maxsize=1024)
+def configurations(constraints, width, offset=0, budget=BUDGET):
+    """
+    Counts the mine configurations of a component that satisfy all its
+    constraints, a frozenset of (mask, count) pairs whose bit 0 is cell
+    number `offset` of a board `width` cells wide, caching the counts of
+    recently seen components.
+
+    Returns a dict mapping each possible number of mines to the number of
+    configurations with that many mines and, for each cell, how many of
+    them make it a mine, or None if counting takes more than `budget`
+    search nodes or the component is too large to search recursively.
+    """
+    constraints = sorted(constraints, key=lambda constraint: (
+        constraint[0].bit_count(), constraint[0]))
+
+    # Order cells constraint by constraint, smallest first, so that each
+    # constraint is fully assigned soon after it is first touched
+    bits = []
+    seen = 0
+    for mask, count in constraints:
+        bits.extend(mask_bits(mask & ~seen))
+        seen |= mask
+    of_cell = [[] for _ in bits]
+    index = {bit: i for i, bit in enumerate(bits)}
+    need = []
+    left = []
+    for c, (mask, count) in enumerate(constraints):
+        for bit in mask_bits(mask):
+            of_cell[index[bit]].append(c)
+        need.append(count)
+        left.append(mask.bit_count())
+
+    assignment = [0] * len(bits)
+    table = {}
+    nodes = 0
+
+    def search(i, mines):
+        nonlocal nodes
+        nodes += 1
+        if nodes > budget:
+            raise BudgetExceeded
+        if i == len(bits):
+            if mines not in table:
+                table[mines] = [0, [0] * len(bits)]
+            entry = table[mines]
+            entry[0] += 1
+            counts = entry[1]
+            for j, value in enumerate(assignment):
+                counts[j] += value
+            return
+        for value in (0, 1):
+            consistent = True
+            for c in of_cell[i]:
+                need[c] -= value
+                left[c] -= 1
+                if need[c] < 0 or need[c] > left[c]:
+                    consistent = False
+            if consistent:
+                assignment[i] = value
+                search(i + 1, mines + value)
+            for c in of_cell[i]:
+                need[c] += value
+                left[c] += 1
+        assignment[i] = 0
+
+    try:
+        search(0, 0)
+    except (BudgetExceeded, RecursionError):
+        return None
+    cells = [divmod(offset + bit, width) for bit in bits]
+    return {
+        mines: (ways, dict(zip(cells, counts)))
+        for mines, (ways, counts) in table.items()
+    }
+
+
+def convolve(a, b):
+    """
+    Returns the number of ways to get each total number of mines from two
+    independent {mines: ways} distributions.
+    """
+    result = {}
+    for i, x in a.items():
+        for j, y in b.items():
+            result[i + j] = result.get(i + j, 0) + x * y
+    return result
+
+
+def mine_probabilities(tables, interior, remaining):
+    """
+    Returns the probability that each cell is a mine, given the
+    configuration tables of the components, the number of cells no
+    sentence mentions and the number of mines left to place.
+
+    Returns None if no configuration leaves a possible number of mines
+    for the interior cells.
+    """
+    distributions = [{mines: entry[0] for mines, entry in table.items()}
+                     for table in tables]
+
+    def placements(mines):
+        """Ways to place mines among the interior cells."""
+        if 0 <= remaining - mines <= interior:
+            return math.comb(interior, remaining - mines)
+        return 0
+
+    total = {0: 1}
+    for distribution in distributions:
+        total = convolve(total, distribution)
+    weight = sum(ways * placements(mines) for mines, ways in total.items())
+    if not weight:
+        return None
+
+    probabilities = {}
+    for c, table in enumerate(tables):
+        others = {0: 1}
+        for d, distribution in enumerate(distributions):
+            if d != c:
+                others = convolve(others, distribution)
+        for mines, (ways, counts) in table.items():
+            rest = sum(other_ways * placements(mines + other_mines)
+                       for other_mines, other_ways in others.items())
+            for cell, count in counts.items():
+                probabilities[cell] = (probabilities.get(cell, 0)
+                                       + count * rest)
+    for cell in probabilities:
+        probabilities[cell] /= weight
+
+    if interior:
+        expected = sum(ways * placements(mines) * (remaining - mines)
+                       for mines, ways in total.items())
+        probabilities[None] = expected / weight / interior
+    return probabilities
+
+
+class ProbabilisticAI(MinesweeperAI):
+    """
+    Minesweeper player that, with no safe move left, makes the move least
+    likely to hit one of the `mines` mines on the board.
+    """
+
+    def __init__(self, height=8, width=8, mines=8, budget=BUDGET):
+        super().__init__(height=height, width=width)
+        self.total_mines = mines
+        self.budget = budget
+
+    def make_random_move(self):
+        """
+        Returns the cell least likely to be a mine, among cells that have
+        not already been chosen and are not known to be mines.
+        """
+        risks = self.mine_probabilities()
+        if not risks:
+            return None
+        return min(risks, key=lambda cell: (risks[cell], cell))
+
+    def mine_probabilities(self):
+        """
+        Returns the probability that each cell not already chosen nor
+        known to be a mine is a mine.
+
+        Components whose configurations take more than the budget to
+        count get the highest count / cells ratio of their sentences as
+        an estimate instead, and that many fewer mines are left for
+        the rest of the board.
+        """
+        unknown = {
+            divmod(index, self.width) for index in self.unknown
+        } - self.moves_made - self.mines
+        risks = {cell: 0.0 for cell in unknown & self.safes}
+        unknown -= self.safes
+        remaining = self.total_mines - len(self.mines)
+
+        tables = []
+        frontier = set()
+        for group in components([
+            sentence for sentence in self.knowledge if sentence.mask
+        ]):
+            offset = min(sentence.offset for sentence in group)
+            constraints = frozenset(
+                (sentence.mask << sentence.offset - offset, sentence.count)
+                for sentence in group)
+            union = 0
+            for mask, count in constraints:
+                union |= mask
+            frontier |= {
+                divmod(offset + bit, self.width) for bit in mask_bits(union)
+            }
+            table = configurations(constraints, self.width, offset,
+                                   self.budget)
+            if table is not None:
+                tables.append(table)
+            else:
+                estimates = {
+                    divmod(offset + bit, self.width): max(
+                        count / mask.bit_count()
+                        for mask, count in constraints if mask >> bit & 1)
+                    for bit in mask_bits(union)
+                }
+                risks.update(estimates)
+                remaining -= round(sum(estimates.values()))
+
+        interior = unknown - frontier
+        probabilities = mine_probabilities(tables, len(interior),
+                                           max(remaining, 0))
+        if probabilities is None:
+            density = max(remaining, 0) / max(len(unknown), 1)
+            probabilities = {cell: density for cell in frontier}
+            probabilities[None] = density
+        for cell in interior:
+            risks[cell] = probabilities[None]
+        for cell in frontier:
+            if cell not in risks:
+                risks[cell] = probabilities[cell]
+        return risks
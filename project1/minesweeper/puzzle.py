@@ -77,8 +77,9 @@ def main():
         if len(knowledge.conjuncts) == 0:
             print("    Not yet implemented.")
         else:
-            for symbol in symbols:
-                if model_check(knowledge, symbol):
+            results, _ = model_check_all(knowledge, symbols)
+            for symbol, entailed in zip(symbols, results):
+                if entailed:
                     print(f"    {symbol}")
 
 
@@ -0,0 +1,125 @@
+"""
+Headless simulator for the Minesweeper AI.
+
+Plays many games of one board size without the pygame runner, across a
+pool of worker processes, and reports the win rate, move throughput,
+time per move and knowledge base size. Game i is played with random
+seed `seed + i`, so a run gives the same games whatever the number of
+workers.
+"""
+
+import argparse
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from minesweeper import Minesweeper, MinesweeperAI
+from probability import ProbabilisticAI
+
+# Players by name, each built from (height, width, mines)
+PLAYERS = {
+    "random": lambda height, width, mines: MinesweeperAI(
+        height=height, width=width),
+    "probability": lambda height, width, mines: ProbabilisticAI(
+        height=height, width=width, mines=mines)
+}
+
+
+def play(player, height, width, mines):
+    """
+    Plays one full game the way the AI button of runner.py does, with
+    every click revealing the cells that flood-fill uncovers.
+
+    Returns whether the AI won, how many moves it made, the largest
+    number of sentences its knowledge base held, and the seconds it
+    spent choosing moves and adding the knowledge they revealed.
+    """
+    game = Minesweeper(height=height, width=width, mines=mines)
+    ai = player(height, width, mines)
+    safe_cells = height * width - mines
+    peak = 0
+    choosing = inferring = 0
+    while len(ai.moves_made) < safe_cells:
+        start = time.perf_counter()
+        move = ai.make_safe_move()
+        if move is None:
+            move = ai.make_random_move()
+        choosing += time.perf_counter() - start
+        if move is None:
+            break
+        if game.is_mine(move):
+            return False, len(ai.moves_made), peak, choosing, inferring
+        start = time.perf_counter()
+        for cell, count in game.reveal(move).items():
+            if cell not in ai.moves_made:
+                ai.add_knowledge(cell, count)
+        inferring += time.perf_counter() - start
+        peak = max(peak, len(ai.knowledge))
+    return True, len(ai.moves_made), peak, choosing, inferring
+
+
+def play_seeded(player_name, height, width, mines, seed):
+    """
+    Plays one game with the given random seed and returns the results
+    of `play`.
+    """
+    random.seed(seed)
+    return play(PLAYERS[player_name], height, width, mines)
+
+
+def simulate(executor, games, player_name, height, width, mines, seed=0):
+    """
+    Plays `games` games on the executor and returns their statistics.
+    """
+    start = time.perf_counter()
+    results = list(executor.map(
+        play_seeded, [player_name] * games, [height] * games,
+        [width] * games, [mines] * games, range(seed, seed + games),
+        chunksize=max(1, games // 64)))
+    elapsed = time.perf_counter() - start
+
+    moves = sum(result[1] for result in results)
+    choosing = sum(result[3] for result in results)
+    inferring = sum(result[4] for result in results)
+    return {
+        "games": games,
+        "win rate": sum(result[0] for result in results) / games,
+        "moves": moves,
+        "seconds": elapsed,
+        "moves/s": moves / elapsed,
+        "choice ms/move": 1000 * choosing / max(moves, 1),
+        "inference ms/move": 1000 * inferring / max(moves, 1),
+        "peak sentences": max(result[2] for result in results),
+        "mean peak sentences": sum(result[2] for result in results) / games
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("-n", "--games", type=int, default=1000)
+    parser.add_argument("--height", type=int, default=16)
+    parser.add_argument("--width", type=int, default=30)
+    parser.add_argument("--mines", type=int, default=99)
+    parser.add_argument("--player", choices=sorted(PLAYERS),
+                        default="random")
+    parser.add_argument("--seed", type=int, default=0,
+                        help="random seed of the first game")
+    parser.add_argument("-w", "--workers", type=int,
+                        help="number of worker processes")
+    args = parser.parse_args()
+    if not 0 <= args.mines < args.height * args.width:
+        parser.error("there must be fewer mines than cells")
+    if args.games < 1:
+        parser.error("at least one game must be played")
+
+    with ProcessPoolExecutor(max_workers=args.workers) as executor:
+        stats = simulate(executor, args.games, args.player,
+                         args.height, args.width, args.mines, args.seed)
+    for name, value in stats.items():
+        if isinstance(value, float):
+            value = f"{value:.4f}"
+        print(f"{name:<22}{value:>14}")
+
+
+if __name__ == "__main__":
+    main()
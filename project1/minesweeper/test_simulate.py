@@ -0,0 +1,39 @@
+"""
+Tests that simulated games replay the same way from the same seed.
+
+Usage: python -m pytest test_simulate.py
+"""
+
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+from simulate import play_seeded, simulate
+
+EXPERT = (16, 30, 99)
+
+
+def fresh_workers(count):
+    """
+    Returns an executor whose workers start from a fresh interpreter
+    rather than a copy of this one.
+    """
+    return ProcessPoolExecutor(
+        max_workers=count, mp_context=multiprocessing.get_context("spawn"))
+
+
+def test_seed_replays_in_warmed_up_process():
+    with fresh_workers(1) as fresh:
+        expected = fresh.submit(play_seeded, "random", *EXPERT, 20).result()
+    for seed in range(20):
+        play_seeded("random", *EXPERT, seed)
+    assert play_seeded("random", *EXPERT, 20)[:3] == expected[:3]
+
+
+def test_results_do_not_depend_on_workers():
+    results = []
+    for workers in (1, 3):
+        with fresh_workers(workers) as executor:
+            stats = simulate(executor, 60, "random", *EXPERT)
+        results.append((stats["win rate"], stats["moves"],
+                        stats["peak sentences"]))
+    assert results[0] == results[1]
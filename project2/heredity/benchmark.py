@@ -0,0 +1,108 @@
+"""
+Benchmarks for heredity inference.
+
+Checks that variable elimination gives the same probabilities as
+enumerating every assignment, then times both on random families.
+
+Usage: python benchmark.py
+"""
+
+import os
+import random
+import sys
+import time
+
+from heredity import enumerate_probabilities, load_data
+from inference import marginals
+
+
+def random_family(count, seed=0):
+    """
+    Returns a reproducible family tree of `count` people, in the format
+    of heredity.load_data, each with their trait known a third of the
+    time: starting from one couple, each couple has up to four children,
+    who may marry someone from outside the family and start a couple of
+    their own.
+    """
+    generator = random.Random(seed)
+    people = {}
+
+    def add(mother=None, father=None):
+        name = f"person{len(people)}"
+        trait = None
+        if generator.random() < 1 / 3:
+            trait = generator.random() < 0.3
+        people[name] = {
+            "name": name,
+            "mother": mother,
+            "father": father,
+            "trait": trait
+        }
+        return name
+
+    couples = [(add(), add())]
+    while couples and len(people) < count:
+        mother, father = couples.pop(0)
+        for _ in range(generator.randint(1, 4)):
+            if len(people) == count:
+                break
+            child = add(mother, father)
+            if len(people) < count and generator.random() < 0.6:
+                couples.append((child, add()))
+        if not couples and len(people) < count:
+            couples.append((add(), add()))
+    return people
+
+
+def difference(a, b):
+    """
+    Returns the largest absolute difference between two sets of
+    probabilities.
+    """
+    return max(
+        abs(a[person][field][value] - b[person][field][value])
+        for person in a
+        for field in a[person]
+        for value in a[person][field]
+    )
+
+
+def timed(function, people):
+    """
+    Returns the result of `function(people)` and the seconds it took.
+    """
+    start = time.perf_counter()
+    result = function(people)
+    return result, time.perf_counter() - start
+
+
+def main():
+    if len(sys.argv) != 1:
+        sys.exit("Usage: python benchmark.py")
+
+    directory = os.path.join(os.path.dirname(__file__), "data")
+    families = [
+        (filename, load_data(os.path.join(directory, filename)))
+        for filename in sorted(os.listdir(directory))
+    ]
+    families += [(f"random {size} #{seed}", random_family(size, seed))
+                 for size in (4, 6) for seed in range(5)]
+    print(f"{'family':<16}{'people':>7}{'enumeration':>13}"
+          f"{'elimination':>13}{'difference':>12}")
+    for name, people in families:
+        expected, enumerating = timed(enumerate_probabilities, people)
+        result, eliminating = timed(marginals, people)
+        error = difference(expected, result)
+        print(f"{name:<16}{len(people):>7}{enumerating:>13.4f}"
+              f"{eliminating:>13.4f}{error:>12.1e}")
+        if error > 1e-9:
+            sys.exit("Variable elimination disagrees with enumeration.")
+
+    print(f"{'family':<16}{'people':>7}{'elimination':>13}")
+    for size in (10, 100, 300, 1000):
+        _, eliminating = timed(marginals, random_family(size))
+        print(f"{'random':<16}{size:>7}{eliminating:>13.4f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -44,6 +44,15 @@ def main():
     if len(sys.argv) != 2:
         sys.exit("Usage: python heredity.py data.csv")
     people = load_data(sys.argv[1])
+    print_probabilities(people, enumerate_probabilities(people))
+
+
+def enumerate_probabilities(people):
+    """
+    Returns every person's gene and trait distributions, summing the
+    joint probability of every assignment of genes and traits that
+    agrees with the known traits.
+    """
 
     # Keep track of gene and trait probabilities for each person
     probabilities = {
@@ -84,8 +93,13 @@ def main():
 
     # Ensure probabilities sum to 1
     normalize(probabilities)
+    return probabilities
 
-    # Print results
+
+def print_probabilities(people, probabilities):
+    """
+    Prints every person's gene and trait distributions.
+    """
     for person in people:
         print(f"{person}:")
         for field in probabilities[person]:
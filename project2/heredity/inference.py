@@ -0,0 +1,233 @@
+"""
+Exact inference for heredity by variable elimination.
+
+Every person's gene count is a variable, with one factor over it and
+their parents' gene counts built from PROBS and their known trait, if
+any. Eliminating the variables one at a time groups the factors into a
+tree of clusters; passing messages up that tree and back down gives
+every person's gene distribution, where heredity.py enumerates every
+assignment of genes and traits. Traits that are not known follow from
+the gene distributions.
+
+The time taken grows with the number of people, but exponentially with
+the size of the largest cluster: family trees stay fast at thousands of
+people, while families that marry within themselves over many
+generations may not.
+
+Usage: python inference.py data.csv
+"""
+
+import itertools
+import sys
+
+from heredity import PROBS, load_data, print_probabilities
+
+GENES = (0, 1, 2)
+
+
+class Factor():
+    """
+    Function of the gene counts of some people: `table` maps every
+    assignment of gene counts to the names in `variables` to a value.
+    """
+
+    def __init__(self, variables, table):
+        self.variables = variables
+        self.table = table
+
+    def product(self, other):
+        """
+        Returns the product of two factors.
+        """
+        variables = self.variables + tuple(
+            variable for variable in other.variables
+            if variable not in self.variables)
+        mine = positions(variables, self.variables)
+        theirs = positions(variables, other.variables)
+        table = {}
+        for assignment in itertools.product(GENES, repeat=len(variables)):
+            table[assignment] = (
+                self.table[tuple(assignment[i] for i in mine)]
+                * other.table[tuple(assignment[i] for i in theirs)])
+        return Factor(variables, table)
+
+    def marginal(self, variables):
+        """
+        Returns the factor summed over everyone not in `variables`, scaled
+        to sum to 1 so that long chains of products do not underflow.
+        """
+        keep = tuple(variable for variable in self.variables
+                     if variable in variables)
+        indexes = positions(self.variables, keep)
+        table = dict.fromkeys(itertools.product(GENES, repeat=len(keep)), 0)
+        for assignment, value in self.table.items():
+            table[tuple(assignment[i] for i in indexes)] += value
+        total = sum(table.values())
+        if total:
+            table = {key: value / total for key, value in table.items()}
+        return Factor(keep, table)
+
+
+def positions(variables, subset):
+    """
+    Returns the position in `variables` of each variable of `subset`.
+    """
+    return [variables.index(variable) for variable in subset]
+
+
+def product(factors):
+    """
+    Returns the product of a list of factors.
+    """
+    result = Factor((), {(): 1})
+    for factor in factors:
+        result = result.product(factor)
+    return result
+
+
+def inheritance(genes, mother, father, probs=PROBS):
+    """
+    Returns the probability that a child has `genes` copies of the gene
+    given the number of copies of each of their parents.
+    """
+    mutation = probs["mutation"]
+    passing = {0: mutation, 1: 0.5, 2: 1 - mutation}
+    from_mother = passing[mother]
+    from_father = passing[father]
+    if genes == 0:
+        return (1 - from_mother) * (1 - from_father)
+    if genes == 1:
+        return (from_mother * (1 - from_father)
+                + (1 - from_mother) * from_father)
+    return from_mother * from_father
+
+
+def person_factor(person, probs=PROBS):
+    """
+    Returns the factor of a person: the probability of their gene count
+    given their parents', or unconditionally if they have none, times the
+    probability of their trait if it is known.
+    """
+    name = person["name"]
+    trait = person["trait"]
+
+    def evidence(genes):
+        return 1 if trait is None else probs["trait"][genes][trait]
+
+    if person["mother"] is None:
+        return Factor((name,), {
+            (genes,): probs["gene"][genes] * evidence(genes)
+            for genes in GENES
+        })
+    mother, father = person["mother"], person["father"]
+    return Factor((name, mother, father), {
+        (genes, m, f): inheritance(genes, m, f, probs) * evidence(genes)
+        for genes, m, f in itertools.product(GENES, repeat=3)
+    })
+
+
+def elimination_order(factors):
+    """
+    Returns the variables of the factors in the order to eliminate them,
+    each time picking the one with the fewest neighbors left, so that
+    clusters stay small.
+    """
+    neighbors = {}
+    for factor in factors:
+        for variable in factor.variables:
+            neighbors.setdefault(variable, set()).update(factor.variables)
+    for variable, others in neighbors.items():
+        others.discard(variable)
+
+    order = []
+    while neighbors:
+        variable = min(neighbors,
+                       key=lambda variable: (len(neighbors[variable]),
+                                             variable))
+        others = neighbors.pop(variable)
+        for other in others:
+            neighbors[other] |= others
+            neighbors[other].discard(other)
+            neighbors[other].discard(variable)
+        order.append(variable)
+    return order
+
+
+def gene_marginals(people, probs=PROBS):
+    """
+    Returns, for every person, the distribution of their gene count
+    given the known traits, as a dict mapping gene counts to
+    probabilities.
+    """
+    factors = [person_factor(people[person], probs) for person in people]
+    order = elimination_order(factors)
+    rank = {variable: i for i, variable in enumerate(order)}
+
+    # Give every factor to the cluster of its first variable eliminated
+    own = {variable: [] for variable in order}
+    for factor in factors:
+        own[min(factor.variables, key=rank.get)].append(factor)
+
+    # Upward pass: each cluster sums its variable out of the product of
+    # its factors and its children's messages, and sends the result to
+    # the cluster of the first variable of it eliminated next
+    children = {variable: [] for variable in order}
+    up = {}
+    for variable in order:
+        cluster = product(own[variable]
+                          + [up[child] for child in children[variable]])
+        message = cluster.marginal(set(cluster.variables) - {variable})
+        up[variable] = message
+        if message.variables:
+            children[min(message.variables, key=rank.get)].append(variable)
+
+    # Downward pass: each cluster sends every child the product of
+    # everything else it knows, summed down to the variables they share
+    down = {}
+    marginals = {}
+    for variable in reversed(order):
+        incoming = own[variable] + ([down[variable]]
+                                    if variable in down else [])
+        for child in children[variable]:
+            down[child] = product(
+                incoming + [up[other] for other in children[variable]
+                            if other != child]
+            ).marginal(set(up[child].variables))
+        belief = product(incoming
+                         + [up[child] for child in children[variable]])
+        table = belief.marginal({variable}).table
+        marginals[variable] = {genes: table[(genes,)] for genes in GENES}
+    return marginals
+
+
+def marginals(people, probs=PROBS):
+    """
+    Returns every person's gene and trait distributions, in the format
+    of heredity.enumerate_probabilities.
+    """
+    genes = gene_marginals(people, probs)
+    probabilities = {}
+    for person in people:
+        gene = {count: genes[person][count] for count in (2, 1, 0)}
+        trait = people[person]["trait"]
+        if trait is None:
+            p = sum(gene[count] * probs["trait"][count][True]
+                    for count in GENES)
+        else:
+            p = 1.0 if trait else 0.0
+        probabilities[person] = {
+            "gene": gene,
+            "trait": {True: p, False: 1 - p}
+        }
+    return probabilities
+
+
+def main():
+    if len(sys.argv) != 2:
+        sys.exit("Usage: python inference.py data.csv")
+    people = load_data(sys.argv[1])
+    print_probabilities(people, marginals(people))
+
+
+if __name__ == "__main__":
+    main()